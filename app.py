@@ -17,9 +17,20 @@ import tempfile
 import secrets
 import time
 import shutil
+import threading
+import queue
+import atexit
 import urllib.error
 import urllib.request
+try:
+    import fcntl
+except ImportError:  # Windows has no flock; lock files through msvcrt instead.
+    fcntl = None
+    import msvcrt
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor
 from collections.abc import Mapping
+from contextlib import contextmanager
 from functools import wraps
 from datetime import date, datetime, timedelta
 from pathlib import Path
@@ -36,6 +47,8 @@ from markupsafe import Markup
 import pandas as pd
 from openpyxl import load_workbook
 
+from schema_version import SQLITE_SCHEMA_VERSION
+
 # ==========================================================
 # APP CONFIG
 # ==========================================================
@@ -60,6 +73,9 @@ DB_FILE = os.environ.get("TASTERIST_DB_FILE", DEFAULT_DB_FILE)
 IMPORT_LOG_FILE = os.path.join(IMPORT_PREVIEW_DIR, "last_import.log")
 IMPORT_META_FILE = os.path.join(IMPORT_PREVIEW_DIR, "last_import_meta.json")
 RESTORE_LOG_FILE = os.path.join(IMPORT_PREVIEW_DIR, "last_restore.log")
+IMPORT_MANIFEST_FILE = os.path.join(IMPORT_PREVIEW_DIR, "import_manifest.json")
+IMPORT_JOB_FILE = os.path.join(IMPORT_PREVIEW_DIR, "import_job.json")
+IMPORT_JOB_LOCK_FILE = os.path.join(IMPORT_PREVIEW_DIR, "import_job.lock")
 DAY_ORDER = {
     "Monday": 0,
     "Tuesday": 1,
@@ -70,6 +86,11 @@ DAY_ORDER = {
     "Sunday": 6,
 }
 WEEKDAY_NAMES = ["Monday", "Tuesday", "Wednesday", "Thursday", "Friday", "Saturday", "Sunday"]
+WEEKDAY_NAME_SET = frozenset(WEEKDAY_NAMES)
+# Alphabetical, so (DAY_ORDER, PROGRAMME_IDX) keys sort the same way the names do.
+PROGRAMME_IDX = {"honley": 0, "lockwood": 1, "preschool": 2}
+# Index order of SQL strftime('%w', ...): 0=Sunday.
+SQL_DOW_NAMES = ("Sunday", "Monday", "Tuesday", "Wednesday", "Thursday", "Friday", "Saturday")
 MONTH_NAMES = [
     "January", "February", "March", "April", "May", "June",
     "July", "August", "September", "October", "November", "December"
@@ -86,10 +107,14 @@ WEAK_PASSWORDS = {
     "qwerty",
     "letmein",
 }
+# Explicit hash method so request latency does not drift with werkzeug's default
+# cost (scrypt in werkzeug 3). Existing hashes of any method still verify.
+PASSWORD_HASH_METHOD = os.environ.get("TASTERIST_PASSWORD_HASH_METHOD", "pbkdf2:sha256:260000").strip()
 LOGIN_RATE_LIMIT_WINDOW_SEC = int(os.environ.get("TASTERIST_LOGIN_WINDOW_SEC", "900"))
 LOGIN_RATE_LIMIT_ATTEMPTS = int(os.environ.get("TASTERIST_LOGIN_MAX_ATTEMPTS", "8"))
 LOGIN_LOCKOUT_SEC = int(os.environ.get("TASTERIST_LOGIN_LOCKOUT_SEC", "900"))
 SQLITE_BUSY_TIMEOUT_MS = int(os.environ.get("TASTERIST_SQLITE_BUSY_TIMEOUT_MS", "60000"))
+SQLITE_MMAP_SIZE = int(os.environ.get("TASTERIST_SQLITE_MMAP_SIZE", str(256 * 1024 * 1024)))
 DB_INIT_MAX_RETRIES = int(os.environ.get("TASTERIST_DB_INIT_MAX_RETRIES", "8"))
 ADMIN_DAY_PROGRAMMES = ("preschool", "honley", "lockwood")
 ADMIN_DAY_HIDDEN_CELLS = {
@@ -106,6 +131,8 @@ if DB_BACKEND not in {"sqlite", "postgres"}:
 if DB_BACKEND == "postgres" and not DATABASE_URL:
     DB_BACKEND = "sqlite"
 USING_POSTGRES = DB_BACKEND == "postgres"
+# UPDATE/INSERT ... RETURNING needs SQLite 3.35+; Postgres always supports it.
+DB_SUPPORTS_RETURNING = USING_POSTGRES or sqlite3.sqlite_version_info >= (3, 35, 0)
 
 
 def load_app_version():
@@ -255,6 +282,86 @@ def get_import_source_folder():
     return LOCAL_SHEETS_FALLBACK
 
 
+IMPORT_XLSX_COUNT_TTL_SEC = 30
+# Chunk size for upload copies and backup downloads (Werkzeug defaults to 16 KiB).
+FILE_COPY_CHUNK_BYTES = 1024 * 1024
+PATH_CHECK_TTL_SEC = 10
+_xlsx_count_cache = {}
+_path_check_cache = {}
+
+
+def write_import_manifest(import_root):
+    # Walk the import tree once, recording the workbook count and every
+    # directory's mtime. Kept outside import_root so writing it doesn't bump them.
+    count = 0
+    dirs = {}
+    for dirpath, _, filenames in os.walk(import_root):
+        try:
+            dirs[os.path.relpath(dirpath, import_root)] = os.stat(dirpath).st_mtime_ns
+        except OSError:
+            continue
+        count += sum(
+            1 for name in filenames
+            if name.endswith(".xlsx") and not name.startswith("~$")
+        )
+    manifest = {"root": str(import_root), "count": count, "dirs": dirs}
+    try:
+        os.makedirs(IMPORT_PREVIEW_DIR, exist_ok=True)
+        tmp_path = f"{IMPORT_MANIFEST_FILE}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(manifest, f)
+        os.replace(tmp_path, IMPORT_MANIFEST_FILE)
+    except OSError:
+        pass
+    return count
+
+
+def read_import_manifest_count(import_root):
+    # Adding or removing a file bumps its directory's mtime, so matching every
+    # recorded directory mtime proves the count current without listing files.
+    try:
+        with open(IMPORT_MANIFEST_FILE, "r", encoding="utf-8") as f:
+            manifest = json.load(f)
+        if manifest.get("root") != str(import_root):
+            return None
+        for rel_dir, mtime in manifest["dirs"].items():
+            if os.stat(os.path.join(import_root, rel_dir)).st_mtime_ns != mtime:
+                return None
+        return int(manifest["count"])
+    except (OSError, ValueError, KeyError, TypeError, AttributeError):
+        return None
+
+
+def count_import_workbooks(import_root):
+    # Reuse the count briefly in memory, keyed on the folder mtime so top-level
+    # changes show up straight away; otherwise prefer the on-disk manifest.
+    try:
+        mtime = import_root.stat().st_mtime_ns
+    except OSError:
+        return 0
+    now = time.monotonic()
+    cached = _xlsx_count_cache.get(str(import_root))
+    if cached and cached["mtime"] == mtime and now - cached["at"] < IMPORT_XLSX_COUNT_TTL_SEC:
+        return cached["count"]
+    count = read_import_manifest_count(import_root)
+    if count is None:
+        count = write_import_manifest(import_root)
+    _xlsx_count_cache[str(import_root)] = {"mtime": mtime, "count": count, "at": now}
+    return count
+
+
+def path_access_ok(path, mode):
+    # Preflight permission checks, cached for a few seconds per (path, mode).
+    key = (str(path), mode)
+    now = time.monotonic()
+    cached = _path_check_cache.get(key)
+    if cached and now - cached[1] < PATH_CHECK_TTL_SEC:
+        return cached[0]
+    ok = os.path.exists(path) and os.access(path, mode)
+    _path_check_cache[key] = (ok, now)
+    return ok
+
+
 class RowCompat(Mapping):
     def __init__(self, columns, values):
         self._columns = tuple(columns)
@@ -384,6 +491,12 @@ class PostgresCursorCompat:
     def rowcount(self):
         return self._cur.rowcount
 
+    @property
+    def lastrowid(self):
+        with self._cur.connection.cursor() as cur:
+            cur.execute("SELECT pg_catalog.lastval()")
+            return cur.fetchone()[0]
+
     @property
     def description(self):
         return self._cur.description
@@ -419,6 +532,17 @@ class PostgresConnectionCompat:
     def close(self):
         self._conn.close()
 
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        # Mirror sqlite3.Connection: commit/rollback the transaction, keep the connection open.
+        if exc_type is None:
+            self._conn.commit()
+        else:
+            self._conn.rollback()
+        return False
+
     def __getattr__(self, name):
         return getattr(self._conn, name)
 
@@ -428,10 +552,30 @@ def _connect_postgres():
     return PostgresConnectionCompat(psycopg.connect(DATABASE_URL))
 
 
+def _integrity_error_types():
+    if USING_POSTGRES:
+        import psycopg
+        return (sqlite3.IntegrityError, psycopg.IntegrityError)
+    return (sqlite3.IntegrityError,)
+
+
+# Constraint violations from whichever backend is active, for `except` clauses.
+DB_INTEGRITY_ERRORS = _integrity_error_types()
+
+
 def _connect_sqlite():
     os.makedirs(os.path.dirname(DB_FILE), exist_ok=True)
-    conn = sqlite3.connect(DB_FILE, timeout=max(5, SQLITE_BUSY_TIMEOUT_MS // 1000))
+    conn = sqlite3.connect(
+        DB_FILE,
+        timeout=max(5, SQLITE_BUSY_TIMEOUT_MS // 1000),
+        cached_statements=256,
+    )
     conn.execute(f"PRAGMA busy_timeout = {SQLITE_BUSY_TIMEOUT_MS}")
+    conn.execute("PRAGMA synchronous=NORMAL")
+    conn.execute("PRAGMA cache_size=-20000")
+    # Read pages through the OS page cache and keep sort/temp b-trees in memory.
+    conn.execute(f"PRAGMA mmap_size={SQLITE_MMAP_SIZE}")
+    conn.execute("PRAGMA temp_store=MEMORY")
     conn.row_factory = sqlite3.Row
     return conn
 
@@ -724,60 +868,65 @@ def _init_db_once():
                 updated_at REAL NOT NULL DEFAULT 0
             )
         """)
-        # Backward-compat: old DBs may still use leave_date only.
-        leaver_cols = {
-            row[1] for row in cur.execute("PRAGMA table_info(leavers)")
-        }
-        if "leave_month" not in leaver_cols and "leave_date" in leaver_cols:
-            cur.execute("ALTER TABLE leavers ADD COLUMN leave_month TEXT")
-            cur.execute("""
-                UPDATE leavers
-                SET leave_month = substr(leave_date, 1, 7)
-                WHERE leave_month IS NULL
-            """)
-        if "leave_date" not in leaver_cols:
-            cur.execute("ALTER TABLE leavers ADD COLUMN leave_date TEXT DEFAULT ''")
-        if "class_day" not in leaver_cols:
-            cur.execute("ALTER TABLE leavers ADD COLUMN class_day TEXT DEFAULT ''")
-        if "session" not in leaver_cols:
-            cur.execute("ALTER TABLE leavers ADD COLUMN session TEXT DEFAULT ''")
-        if "class_name" not in leaver_cols:
-            cur.execute("ALTER TABLE leavers ADD COLUMN class_name TEXT DEFAULT ''")
-        if "removed_la" not in leaver_cols:
-            cur.execute("ALTER TABLE leavers ADD COLUMN removed_la INTEGER DEFAULT 0")
-        if "removed_bg" not in leaver_cols:
-            cur.execute("ALTER TABLE leavers ADD COLUMN removed_bg INTEGER DEFAULT 0")
-        if "added_to_board" not in leaver_cols:
-            cur.execute("ALTER TABLE leavers ADD COLUMN added_to_board INTEGER DEFAULT 0")
-        if "reason" not in leaver_cols:
-            cur.execute("ALTER TABLE leavers ADD COLUMN reason TEXT DEFAULT ''")
-        if "email" not in leaver_cols:
-            cur.execute("ALTER TABLE leavers ADD COLUMN email TEXT DEFAULT ''")
-        class_cols = {
-            row[1] for row in cur.execute("PRAGMA table_info(class_sessions)")
-        }
-        if "session_date" not in class_cols:
-            cur.execute(
-                "ALTER TABLE class_sessions ADD COLUMN session_date TEXT NOT NULL DEFAULT ''"
-            )
-        taster_cols = {
-            row[1] for row in cur.execute("PRAGMA table_info(tasters)")
-        }
-        if "class_name" not in taster_cols:
-            cur.execute("ALTER TABLE tasters ADD COLUMN class_name TEXT DEFAULT ''")
-        if "club_fees" not in taster_cols:
-            cur.execute("ALTER TABLE tasters ADD COLUMN club_fees INTEGER DEFAULT 0")
-        if "reschedule_contacted" not in taster_cols:
-            cur.execute("ALTER TABLE tasters ADD COLUMN reschedule_contacted INTEGER DEFAULT 0")
-        user_cols = {
-            row[1] for row in cur.execute("PRAGMA table_info(users)")
-        }
-        if "full_name" not in user_cols:
-            cur.execute("ALTER TABLE users ADD COLUMN full_name TEXT NOT NULL DEFAULT ''")
-        if "password_must_change" not in user_cols:
-            cur.execute("ALTER TABLE users ADD COLUMN password_must_change INTEGER NOT NULL DEFAULT 0")
-        if "email_weekly_reports" not in user_cols:
-            cur.execute("ALTER TABLE users ADD COLUMN email_weekly_reports INTEGER NOT NULL DEFAULT 0")
+        # Column back-fills only need to run once per database file; PRAGMA
+        # user_version records that, so later boots skip the table_info scans.
+        schema_version = cur.execute("PRAGMA user_version").fetchone()[0]
+        if schema_version < SQLITE_SCHEMA_VERSION:
+            # Backward-compat: old DBs may still use leave_date only.
+            leaver_cols = {
+                row[1] for row in cur.execute("PRAGMA table_info(leavers)")
+            }
+            if "leave_month" not in leaver_cols and "leave_date" in leaver_cols:
+                cur.execute("ALTER TABLE leavers ADD COLUMN leave_month TEXT")
+                cur.execute("""
+                    UPDATE leavers
+                    SET leave_month = substr(leave_date, 1, 7)
+                    WHERE leave_month IS NULL
+                """)
+            if "leave_date" not in leaver_cols:
+                cur.execute("ALTER TABLE leavers ADD COLUMN leave_date TEXT DEFAULT ''")
+            if "class_day" not in leaver_cols:
+                cur.execute("ALTER TABLE leavers ADD COLUMN class_day TEXT DEFAULT ''")
+            if "session" not in leaver_cols:
+                cur.execute("ALTER TABLE leavers ADD COLUMN session TEXT DEFAULT ''")
+            if "class_name" not in leaver_cols:
+                cur.execute("ALTER TABLE leavers ADD COLUMN class_name TEXT DEFAULT ''")
+            if "removed_la" not in leaver_cols:
+                cur.execute("ALTER TABLE leavers ADD COLUMN removed_la INTEGER DEFAULT 0")
+            if "removed_bg" not in leaver_cols:
+                cur.execute("ALTER TABLE leavers ADD COLUMN removed_bg INTEGER DEFAULT 0")
+            if "added_to_board" not in leaver_cols:
+                cur.execute("ALTER TABLE leavers ADD COLUMN added_to_board INTEGER DEFAULT 0")
+            if "reason" not in leaver_cols:
+                cur.execute("ALTER TABLE leavers ADD COLUMN reason TEXT DEFAULT ''")
+            if "email" not in leaver_cols:
+                cur.execute("ALTER TABLE leavers ADD COLUMN email TEXT DEFAULT ''")
+            class_cols = {
+                row[1] for row in cur.execute("PRAGMA table_info(class_sessions)")
+            }
+            if "session_date" not in class_cols:
+                cur.execute(
+                    "ALTER TABLE class_sessions ADD COLUMN session_date TEXT NOT NULL DEFAULT ''"
+                )
+            taster_cols = {
+                row[1] for row in cur.execute("PRAGMA table_info(tasters)")
+            }
+            if "class_name" not in taster_cols:
+                cur.execute("ALTER TABLE tasters ADD COLUMN class_name TEXT DEFAULT ''")
+            if "club_fees" not in taster_cols:
+                cur.execute("ALTER TABLE tasters ADD COLUMN club_fees INTEGER DEFAULT 0")
+            if "reschedule_contacted" not in taster_cols:
+                cur.execute("ALTER TABLE tasters ADD COLUMN reschedule_contacted INTEGER DEFAULT 0")
+            user_cols = {
+                row[1] for row in cur.execute("PRAGMA table_info(users)")
+            }
+            if "full_name" not in user_cols:
+                cur.execute("ALTER TABLE users ADD COLUMN full_name TEXT NOT NULL DEFAULT ''")
+            if "password_must_change" not in user_cols:
+                cur.execute("ALTER TABLE users ADD COLUMN password_must_change INTEGER NOT NULL DEFAULT 0")
+            if "email_weekly_reports" not in user_cols:
+                cur.execute("ALTER TABLE users ADD COLUMN email_weekly_reports INTEGER NOT NULL DEFAULT 0")
+            cur.execute(f"PRAGMA user_version = {SQLITE_SCHEMA_VERSION}")
 
     cur.execute("""
         CREATE UNIQUE INDEX IF NOT EXISTS uniq_taster
@@ -791,6 +940,18 @@ def _init_db_once():
         CREATE INDEX IF NOT EXISTS idx_audit_logs_created_at
         ON audit_logs (created_at DESC)
     """)
+    cur.execute("""
+        CREATE INDEX IF NOT EXISTS idx_tasters_month
+        ON tasters (taster_date, programme)
+    """)
+    cur.execute("""
+        CREATE INDEX IF NOT EXISTS idx_leavers_month
+        ON leavers (leave_month, leave_date)
+    """)
+    cur.execute("""
+        CREATE INDEX IF NOT EXISTS idx_tasters_programme
+        ON tasters (programme, taster_date)
+    """)
     cur.execute("""
         CREATE INDEX IF NOT EXISTS idx_login_attempts_updated_at
         ON login_attempts (updated_at DESC)
@@ -831,7 +992,7 @@ def _init_db_once():
         cur.execute("""
             INSERT INTO users (username, password_hash, full_name, role, password_must_change, email_weekly_reports)
             VALUES (?, ?, ?, 'owner', ?, 1)
-        """, (OWNER_EMAIL, generate_password_hash(owner_bootstrap_password), OWNER_NAME, owner_must_change))
+        """, (OWNER_EMAIL, hash_password(owner_bootstrap_password), OWNER_NAME, owner_must_change))
 
     existing_owner = cur.execute(
         "SELECT id FROM users WHERE lower(username)=?",
@@ -855,7 +1016,7 @@ def _init_db_once():
         cur.execute("""
             INSERT INTO users (username, password_hash, full_name, role, password_must_change, email_weekly_reports)
             VALUES (?, ?, ?, 'owner', ?, 1)
-        """, (OWNER_EMAIL, generate_password_hash(owner_bootstrap_password), OWNER_NAME, owner_must_change))
+        """, (OWNER_EMAIL, hash_password(owner_bootstrap_password), OWNER_NAME, owner_must_change))
 
     # Break-glass owner reset for cloud recovery.
     # If TASTERIST_OWNER_RESET_PASSWORD is set, owner password is rotated at startup.
@@ -870,7 +1031,7 @@ def _init_db_once():
                     password_must_change=0,
                     role='owner'
                 WHERE lower(username)=?
-            """, (generate_password_hash(OWNER_RESET_PASSWORD), OWNER_EMAIL))
+            """, (hash_password(OWNER_RESET_PASSWORD), OWNER_EMAIL))
             cur.execute(
                 """
                 INSERT INTO audit_logs (created_at, username, action, entity_type, entity_id, status, details)
@@ -1236,6 +1397,16 @@ def parse_admin_day_values(values):
     return allowed_pairs
 
 
+def replace_user_admin_days(db, user_id, selected_values):
+    db.execute("DELETE FROM user_admin_days WHERE user_id=?", (user_id,))
+    if selected_values:
+        db.executemany("""
+            INSERT INTO user_admin_days (user_id, day_name, programme)
+            VALUES (?, ?, ?)
+            ON CONFLICT(user_id, day_name, programme) DO NOTHING
+        """, [(user_id, day_name, programme) for day_name, programme in selected_values])
+
+
 def is_admin_user(user):
     if not user:
         return False
@@ -1259,6 +1430,10 @@ def owner_required(view_func):
     return wrapped
 
 
+def hash_password(password):
+    return generate_password_hash(password, method=PASSWORD_HASH_METHOD or "pbkdf2:sha256:260000")
+
+
 def password_strength_errors(password):
     value = password or ""
     errors = []
@@ -1377,18 +1552,118 @@ def admin_required(view_func):
     return wrapped
 
 
-def log_audit(action, entity_type="", entity_id="", details="", status="ok"):
-    db = get_db()
-    user = current_user()
-    user_id = user["id"] if user else None
-    username = (user["username"] if user else "system")
-    db.execute("""
-        INSERT INTO audit_logs (
-            created_at, user_id, username, action,
-            entity_type, entity_id, status, details
-        )
-        VALUES (?,?,?,?,?,?,?,?)
-    """, (
+_SQL_INSERT_AUDIT = """
+    INSERT INTO audit_logs (
+        created_at, user_id, username, action,
+        entity_type, entity_id, status, details
+    )
+    VALUES (?,?,?,?,?,?,?,?)
+"""
+AUDIT_BATCH_MAX = max(1, int(os.environ.get("TASTERIST_AUDIT_BATCH_MAX", "100")))
+AUDIT_FLUSH_INTERVAL_SEC = max(0, int(os.environ.get("TASTERIST_AUDIT_FLUSH_MS", "200"))) / 1000
+_audit_queue = queue.Queue()
+_audit_worker_lock = threading.Lock()
+_audit_worker_thread = None
+_AUDIT_STOP = object()
+
+
+def audit_async_enabled():
+    # Off by default: queued rows land after the redirect, so the audit list
+    # could miss the action just taken.
+    return is_env_true("TASTERIST_AUDIT_ASYNC", "0")
+
+
+def _drain_audit_queue():
+    # Block for the first event, then gather more until the batch fills or the
+    # flush interval passes, so bursts land in a single transaction. Returns
+    # (rows, stop); stop is set once the shutdown sentinel has been taken.
+    rows = []
+    item = _audit_queue.get()
+    if item is _AUDIT_STOP:
+        return rows, True
+    rows.append(item)
+    deadline = time.monotonic() + AUDIT_FLUSH_INTERVAL_SEC
+    while len(rows) < AUDIT_BATCH_MAX:
+        remaining = deadline - time.monotonic()
+        if remaining <= 0:
+            break
+        try:
+            item = _audit_queue.get(timeout=remaining)
+        except queue.Empty:
+            break
+        if item is _AUDIT_STOP:
+            return rows, True
+        rows.append(item)
+    return rows, False
+
+
+def _audit_worker():
+    conn = None
+    stop = False
+    while not stop:
+        rows, stop = _drain_audit_queue()
+        if not rows:
+            continue
+        try:
+            if conn is None:
+                conn = open_db_connection()
+            with conn:
+                conn.executemany(_SQL_INSERT_AUDIT, rows)
+        except Exception as exc:
+            print(f"⚠️ Audit write failed ({len(rows)} events dropped): {exc}")
+            if conn is not None:
+                try:
+                    conn.close()
+                except Exception:
+                    pass
+                conn = None
+    if conn is not None:
+        conn.close()
+
+
+def _ensure_audit_worker():
+    global _audit_worker_thread
+    if _audit_worker_thread is not None and _audit_worker_thread.is_alive():
+        return
+    with _audit_worker_lock:
+        if _audit_worker_thread is None or not _audit_worker_thread.is_alive():
+            _audit_worker_thread = threading.Thread(
+                target=_audit_worker,
+                name="tasterist-audit",
+                daemon=True,
+            )
+            _audit_worker_thread.start()
+
+
+@atexit.register
+def flush_audit_queue():
+    # Let the worker finish the batch it is holding, then write whatever is
+    # still queued behind the sentinel.
+    worker = _audit_worker_thread
+    if worker is not None and worker.is_alive():
+        _audit_queue.put(_AUDIT_STOP)
+        worker.join()
+    rows = []
+    while True:
+        try:
+            item = _audit_queue.get_nowait()
+        except queue.Empty:
+            break
+        if item is not _AUDIT_STOP:
+            rows.append(item)
+    if not rows:
+        return
+    try:
+        conn = open_db_connection()
+        with conn:
+            conn.executemany(_SQL_INSERT_AUDIT, rows)
+        conn.close()
+    except Exception as exc:
+        print(f"⚠️ Audit flush failed ({len(rows)} events dropped): {exc}")
+
+
+def build_audit_row(user_id, username, action, entity_type="", entity_id="", details="", status="ok"):
+    return (
         datetime.now().isoformat(timespec="seconds"),
         user_id,
         username,
@@ -1397,7 +1672,41 @@ def log_audit(action, entity_type="", entity_id="", details="", status="ok"):
         str(entity_id or ""),
         status,
         details[:1000],
-    ))
+    )
+
+
+def write_audit_row(row):
+    # For code running outside a request (background jobs): queue the event,
+    # or write it on a short-lived connection of its own.
+    if audit_async_enabled():
+        _ensure_audit_worker()
+        _audit_queue.put_nowait(row)
+        return
+    conn = open_db_connection()
+    try:
+        with conn:
+            conn.execute(_SQL_INSERT_AUDIT, row)
+    finally:
+        conn.close()
+
+
+def log_audit(action, entity_type="", entity_id="", details="", status="ok"):
+    user = current_user()
+    row = build_audit_row(
+        user["id"] if user else None,
+        user["username"] if user else "system",
+        action,
+        entity_type=entity_type,
+        entity_id=entity_id,
+        details=details,
+        status=status,
+    )
+    if audit_async_enabled():
+        _ensure_audit_worker()
+        _audit_queue.put_nowait(row)
+        return
+    db = get_db()
+    db.execute(_SQL_INSERT_AUDIT, row)
     db.commit()
 
 
@@ -1613,10 +1922,8 @@ def _row_applies_to_assignments(assignment_set, day_name, programme):
 
 
 def weekday_from_iso(value):
-    try:
-        return datetime.fromisoformat(str(value)).strftime("%A")
-    except ValueError:
-        return ""
+    parsed = _parse_iso_date(value)
+    return WEEKDAY_NAMES[parsed.weekday()] if parsed else ""
 
 
 def build_weekly_admin_report_context(db, user_id=None):
@@ -1705,12 +2012,8 @@ def build_weekly_admin_report_context(db, user_id=None):
             extract_day_name(row["class_day"])
             or extract_day_name(row["session"])
         )
-        leave_date = str(row["leave_date"] or "").strip()
-        if not day_name and leave_date:
-            try:
-                day_name = datetime.fromisoformat(leave_date).strftime("%A")
-            except ValueError:
-                day_name = ""
+        if not day_name:
+            day_name = weekday_from_iso(row["leave_date"])
         if not _row_applies_to_assignments(assignment_set, day_name, row["programme"]):
             continue
         leavers_month += 1
@@ -1908,6 +2211,14 @@ def send_weekly_admin_report(trigger="manual"):
     }
 
 
+def import_timeout_seconds():
+    timeout_raw = os.environ.get("TASTERIST_IMPORT_TIMEOUT_SEC", "120").strip()
+    try:
+        return max(15, int(timeout_raw))
+    except ValueError:
+        return 120
+
+
 def run_import_process(trigger="manual", replace=False):
     if USING_POSTGRES:
         log_text = (
@@ -1931,11 +2242,7 @@ def run_import_process(trigger="manual", replace=False):
     import_source = get_import_source_folder()
     os.makedirs(import_source, exist_ok=True)
     local_fallback = LOCAL_SHEETS_FALLBACK
-    timeout_raw = os.environ.get("TASTERIST_IMPORT_TIMEOUT_SEC", "120").strip()
-    try:
-        timeout_seconds = max(15, int(timeout_raw))
-    except ValueError:
-        timeout_seconds = 120
+    timeout_seconds = import_timeout_seconds()
     cmd = [
         sys.executable,
         IMPORT_SCRIPT,
@@ -2007,6 +2314,132 @@ def run_import_process(trigger="manual", replace=False):
 
     return result.returncode, log_text
 
+
+# Imports run one at a time off the request thread. Job state lives in a file
+# rather than memory so any gunicorn worker can answer status polls.
+_import_pool = ThreadPoolExecutor(max_workers=1, thread_name_prefix="tasterist-import")
+_import_job_lock = threading.Lock()
+
+
+@contextmanager
+def import_job_state_lock():
+    # The thread lock covers this worker; the flock covers the other gunicorn
+    # workers, so reading and claiming the job state is atomic across both.
+    os.makedirs(IMPORT_PREVIEW_DIR, exist_ok=True)
+    with _import_job_lock, open(IMPORT_JOB_LOCK_FILE, "a") as lock_file:
+        if fcntl is not None:
+            fcntl.flock(lock_file.fileno(), fcntl.LOCK_EX)
+            yield
+            return
+        # msvcrt locks a byte range starting at the current file position.
+        lock_file.seek(0)
+        msvcrt.locking(lock_file.fileno(), msvcrt.LK_LOCK, 1)
+        try:
+            yield
+        finally:
+            lock_file.seek(0)
+            msvcrt.locking(lock_file.fileno(), msvcrt.LK_UNLCK, 1)
+
+
+def _write_import_job_state(state):
+    os.makedirs(IMPORT_PREVIEW_DIR, exist_ok=True)
+    tmp_path = f"{IMPORT_JOB_FILE}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(state, f)
+    os.replace(tmp_path, IMPORT_JOB_FILE)
+
+
+def _running_import_job_state(job_id, trigger):
+    return {
+        "job_id": job_id,
+        "state": "running",
+        "trigger": trigger,
+        "started_at": datetime.now().isoformat(timespec="seconds"),
+        "started_ts": time.time(),
+    }
+
+
+def load_import_job_state():
+    try:
+        with open(IMPORT_JOB_FILE, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def running_import_job():
+    state = load_import_job_state()
+    if not state or state.get("state") != "running":
+        return None
+    # A worker killed mid-import never marks its job done; stop waiting on it
+    # once the subprocess timeout has long passed.
+    if time.time() - float(state.get("started_ts") or 0) > import_timeout_seconds() + 60:
+        return None
+    return state
+
+
+def _run_import_job(job_id, trigger, replace, user_id, username):
+    while True:
+        try:
+            rc, _ = run_import_process(trigger=trigger, replace=replace)
+        except Exception as exc:
+            print(f"⚠️ Import job {job_id} failed: {exc}")
+            rc = 125
+        write_audit_row(build_audit_row(
+            user_id,
+            username,
+            "run_import",
+            entity_type="system",
+            entity_id=trigger,
+            details=f"Import trigger={trigger} replace={1 if replace else 0} rc={rc}",
+            status="ok" if rc == 0 else "warn",
+        ))
+        # A follow-up queued while this run was going starts straight away, so
+        # files uploaded after the folder was listed still get imported.
+        with import_job_state_lock():
+            state = load_import_job_state() or {}
+            follow_up = state.get("follow_up") if state.get("job_id") == job_id else None
+            if not follow_up:
+                _write_import_job_state({
+                    "job_id": job_id,
+                    "state": "done",
+                    "trigger": trigger,
+                    "exit_code": rc,
+                    "finished_at": datetime.now().isoformat(timespec="seconds"),
+                })
+                return rc
+            job_id = secrets.token_hex(8)
+            trigger = follow_up["trigger"]
+            replace = follow_up["replace"]
+            user_id = follow_up["user_id"]
+            username = follow_up["username"]
+            _write_import_job_state(_running_import_job_state(job_id, trigger))
+
+
+def start_import_job(trigger, replace, queue_follow_up=False):
+    # Returns (job_id, started); a job already in flight is reused, not doubled
+    # up. With queue_follow_up, one more run is queued to start when it ends;
+    # repeat requests share that run, and the latest request's options win.
+    user = current_user()
+    user_id = user["id"] if user else None
+    username = user["username"] if user else "system"
+    with import_job_state_lock():
+        running = running_import_job()
+        if running:
+            if queue_follow_up:
+                running["follow_up"] = {
+                    "trigger": trigger,
+                    "replace": replace,
+                    "user_id": user_id,
+                    "username": username,
+                }
+                _write_import_job_state(running)
+            return running["job_id"], False
+        job_id = secrets.token_hex(8)
+        _write_import_job_state(_running_import_job_state(job_id, trigger))
+    _import_pool.submit(_run_import_job, job_id, trigger, replace, user_id, username)
+    return job_id, True
+
 # ==========================================================
 # HELPERS
 # ==========================================================
@@ -2448,16 +2881,41 @@ def extract_day_name(value):
     return ""
 
 
+def leaver_day_name(class_day, session_label, leave_date):
+    # class_day text, then session text, then the weekday of leave_date.
+    return (
+        extract_day_name(class_day)
+        or extract_day_name(session_label)
+        or weekday_from_iso(leave_date)
+    )
+
+
 def _parse_iso_date(value):
+    if isinstance(value, datetime):
+        return value.date()
+    if isinstance(value, date):
+        return value
     text = str(value or "").strip()
     if not text:
         return None
     try:
-        return datetime.fromisoformat(text).date()
+        # Date-only parse; a trailing time component (stored timestamps) is ignored.
+        return date.fromisoformat(text[:10])
     except ValueError:
         return None
 
 
+def weekday_lookup(values):
+    # Parse each distinct ISO date once; rows in a month share a handful of dates.
+    lookup = {}
+    for value in values:
+        if value in lookup:
+            continue
+        parsed = _parse_iso_date(value)
+        lookup[value] = WEEKDAY_NAMES[parsed.weekday()] if parsed else ""
+    return lookup
+
+
 def _programme_has_session_templates_for_day(db, programme, target_date):
     if not target_date:
         return False
@@ -2614,10 +3072,13 @@ def _parse_sheet_date(value, month_name, year):
         return None
 
 
+# Worksheet.max_row/max_column rescan every cell on each access in openpyxl's
+# normal (editable) mode, so the helpers below read them once per call.
 def _find_name_columns_ws(ws, max_scan_rows=25):
+    max_col = ws.max_column
     for r in range(1, min(max_scan_rows, ws.max_row) + 1):
         cols = []
-        for c in range(1, ws.max_column + 1):
+        for c in range(1, max_col + 1):
             v = ws.cell(r, c).value
             if isinstance(v, str) and v.strip().lower() == "name":
                 cols.append(c)
@@ -2628,10 +3089,12 @@ def _find_name_columns_ws(ws, max_scan_rows=25):
 
 def _find_section_rows_ws(ws, marker):
     hits = []
+    marker = marker.lower()
+    max_col = ws.max_column
     for r in range(1, ws.max_row + 1):
-        for c in range(1, ws.max_column + 1):
+        for c in range(1, max_col + 1):
             v = ws.cell(r, c).value
-            if isinstance(v, str) and v.strip().lower() == marker.lower():
+            if isinstance(v, str) and v.strip().lower() == marker:
                 hits.append(r)
                 break
     return hits
@@ -2639,10 +3102,11 @@ def _find_section_rows_ws(ws, marker):
 
 def _find_leaver_header_row_ws(ws, start_row):
     scan_to = min(start_row + 18, ws.max_row)
+    max_col = ws.max_column
     for r in range(start_row, scan_to + 1):
         name_cols = []
         has_leave = False
-        for c in range(1, ws.max_column + 1):
+        for c in range(1, max_col + 1):
             v = ws.cell(r, c).value
             if not isinstance(v, str):
                 continue
@@ -2657,15 +3121,17 @@ def _find_leaver_header_row_ws(ws, start_row):
 
 
 def _build_column_map(ws, name_header_row, name_cols):
+    max_col = ws.max_column
+
     def header_text(col_idx):
-        if col_idx < 1 or col_idx > ws.max_column:
+        if col_idx < 1 or col_idx > max_col:
             return ""
         v = ws.cell(name_header_row, col_idx).value
         return str(v).strip().lower() if v is not None else ""
 
     def find_col(name_col, fallback_offset, matcher):
         fallback = name_col + fallback_offset
-        for c in range(name_col + 1, min(name_col + 11, ws.max_column + 1)):
+        for c in range(name_col + 1, min(name_col + 11, max_col + 1)):
             if matcher(header_text(c)):
                 return c
         return fallback
@@ -2707,15 +3173,17 @@ def _build_column_map(ws, name_header_row, name_cols):
 
 
 def _build_leaver_column_map(ws, header_row, name_cols):
+    max_col = ws.max_column
+
     def header_text(col_idx):
-        if col_idx < 1 or col_idx > ws.max_column:
+        if col_idx < 1 or col_idx > max_col:
             return ""
         v = ws.cell(header_row, col_idx).value
         return str(v).strip().lower() if v is not None else ""
 
     def find_col(name_col, fallback_offset, matcher):
         fallback = name_col + fallback_offset
-        for c in range(name_col + 1, min(name_col + 11, ws.max_column + 1)):
+        for c in range(name_col + 1, min(name_col + 11, max_col + 1)):
             if matcher(header_text(c)):
                 return c
         return fallback
@@ -2786,6 +3254,7 @@ def sync_taster_to_excel(taster_row, mode="add", changed_field="", actor_initial
     if not name_cols:
         return False, "No Name columns found"
     leaver_markers = _find_section_rows_ws(ws, "LEAVERS")
+    max_col = ws.max_column
     taster_end_row = min(leaver_markers) - 1 if leaver_markers else ws.max_row
     column_map = _build_column_map(ws, name_header_row, name_cols)
 
@@ -2807,12 +3276,12 @@ def sync_taster_to_excel(taster_row, mode="add", changed_field="", actor_initial
             day_val = ws.cell(r, cols["day_col"]).value if cols["day_col"] >= 1 else ""
             day_txt = str(day_val).strip() if day_val is not None else ""
             parsed_date = _parse_sheet_date(
-                ws.cell(r, cols["date_col"]).value if cols["date_col"] <= ws.max_column else "",
+                ws.cell(r, cols["date_col"]).value if cols["date_col"] <= max_col else "",
                 month_name,
                 row_date.year
             )
 
-            if day_txt in WEEKDAY_NAMES:
+            if day_txt in WEEKDAY_NAME_SET:
                 block_state[col]["day"] = day_txt
             parsed_time = _extract_time(day_txt)
             if parsed_time:
@@ -2830,7 +3299,7 @@ def sync_taster_to_excel(taster_row, mode="add", changed_field="", actor_initial
 
             if name_txt and name_txt.lower() == str(row["child"]).strip().lower():
                 row_date_cell = _parse_sheet_date(
-                    ws.cell(r, cols["date_col"]).value if cols["date_col"] <= ws.max_column else "",
+                    ws.cell(r, cols["date_col"]).value if cols["date_col"] <= max_col else "",
                     month_name,
                     row_date.year
                 )
@@ -2861,21 +3330,21 @@ def sync_taster_to_excel(taster_row, mode="add", changed_field="", actor_initial
     row_idx, name_col, cols = target_slot
     if mode == "add":
         ws.cell(row_idx, name_col).value = row["child"]
-        if cols["date_col"] <= ws.max_column:
+        if cols["date_col"] <= max_col:
             ws.cell(row_idx, cols["date_col"]).value = f"{row_date.day} {row_date.strftime('%b')}"
-        if cols["notes_col"] <= ws.max_column:
+        if cols["notes_col"] <= max_col:
             new_notes = str(row.get("notes") or "").strip()
             if new_notes:
                 ws.cell(row_idx, cols["notes_col"]).value = new_notes
-        if cols["added_by_col"] <= ws.max_column and actor_initials:
+        if cols["added_by_col"] <= max_col and actor_initials:
             ws.cell(row_idx, cols["added_by_col"]).value = actor_initials
-        if cols["attended_col"] <= ws.max_column:
+        if cols["attended_col"] <= max_col:
             ws.cell(row_idx, cols["attended_col"]).value = _sync_yes_cell(row.get("attended", 0))
-        if cols["club_fees_col"] <= ws.max_column:
+        if cols["club_fees_col"] <= max_col:
             ws.cell(row_idx, cols["club_fees_col"]).value = _sync_yes_cell(row.get("club_fees", 0))
-        if cols["bg_col"] <= ws.max_column:
+        if cols["bg_col"] <= max_col:
             ws.cell(row_idx, cols["bg_col"]).value = _sync_yes_cell(row.get("bg", 0))
-        if cols["badge_col"] <= ws.max_column:
+        if cols["badge_col"] <= max_col:
             ws.cell(row_idx, cols["badge_col"]).value = _sync_yes_cell(row.get("badge", 0))
     elif mode == "status":
         field_col_lookup = {
@@ -2885,11 +3354,11 @@ def sync_taster_to_excel(taster_row, mode="add", changed_field="", actor_initial
             "badge": cols["badge_col"],
         }
         target_col = field_col_lookup.get(changed_field)
-        if not target_col or target_col > ws.max_column:
+        if not target_col or target_col > max_col:
             return False, f"Status column not found for {changed_field}"
         ws.cell(row_idx, target_col).value = _sync_yes_cell(row.get(changed_field, 0))
     elif mode == "contacted":
-        if cols["notes_col"] <= ws.max_column and int(row.get("reschedule_contacted", 0) or 0) == 1:
+        if cols["notes_col"] <= max_col and int(row.get("reschedule_contacted", 0) or 0) == 1:
             old_note = str(ws.cell(row_idx, cols["notes_col"]).value or "").strip()
             if "contacted" not in old_note.lower():
                 ws.cell(row_idx, cols["notes_col"]).value = (
@@ -2941,6 +3410,7 @@ def sync_leaver_to_excel(leaver_row, actor_initials=""):
         return False, "Leaver columns not found"
     column_map = _build_leaver_column_map(ws, header_row, name_cols)
     leaver_start_row = min(leaver_markers)
+    max_col = ws.max_column
 
     target_day = extract_day_name(row.get("class_day")) or leave_dt.strftime("%A")
     target_time = _extract_time(row.get("session"))
@@ -2960,7 +3430,7 @@ def sync_leaver_to_excel(leaver_row, actor_initials=""):
             day_col = cols["day_col"]
             day_val = ws.cell(r, day_col).value if day_col >= 1 else ""
             day_txt = str(day_val).strip() if day_val is not None else ""
-            if day_txt in WEEKDAY_NAMES:
+            if day_txt in WEEKDAY_NAME_SET:
                 block_state[col]["day"] = day_txt
             parsed_time = _extract_time(day_txt)
             if parsed_time:
@@ -2996,19 +3466,19 @@ def sync_leaver_to_excel(leaver_row, actor_initials=""):
 
     row_idx, name_col, cols = target_slot
     ws.cell(row_idx, name_col).value = row.get("child", "")
-    if cols["date_col"] <= ws.max_column:
+    if cols["date_col"] <= max_col:
         ws.cell(row_idx, cols["date_col"]).value = leave_dt.strftime("%d %b")
-    if cols["removed_la_col"] <= ws.max_column:
+    if cols["removed_la_col"] <= max_col:
         ws.cell(row_idx, cols["removed_la_col"]).value = _sync_yes_cell(row.get("removed_la", 0))
-    if cols["removed_bg_col"] <= ws.max_column:
+    if cols["removed_bg_col"] <= max_col:
         ws.cell(row_idx, cols["removed_bg_col"]).value = _sync_yes_cell(row.get("removed_bg", 0))
-    if cols["board_col"] <= ws.max_column:
+    if cols["board_col"] <= max_col:
         ws.cell(row_idx, cols["board_col"]).value = _sync_yes_cell(row.get("added_to_board", 0))
-    if cols["reason_col"] <= ws.max_column:
+    if cols["reason_col"] <= max_col:
         reason_txt = str(row.get("reason") or "").strip()
         if reason_txt:
             ws.cell(row_idx, cols["reason_col"]).value = reason_txt
-    if cols["added_by_col"] <= ws.max_column and actor_initials:
+    if cols["added_by_col"] <= max_col and actor_initials:
         ws.cell(row_idx, cols["added_by_col"]).value = actor_initials
 
     try:
@@ -3307,24 +3777,24 @@ def dashboard():
         WHERE strftime('%Y-%m', taster_date)=?
         GROUP BY programme
     """, (month_key,)).fetchall()
-    counts = {"lockwood": 0, "honley": 0, "preschool": 0}
-    for row in month_by_programme_rows:
-        counts[row["programme"]] = row["c"]
-    max_count = max(counts.values()) if counts else 0
-    month_by_programme = []
-    for key, label in (
+    programme_labels = (
         ("lockwood", "Lockwood"),
         ("honley", "Honley"),
         ("preschool", "Preschool"),
-    ):
-        count = counts.get(key, 0)
-        pct = int((count / max_count) * 100) if max_count > 0 else 0
-        month_by_programme.append({
+    )
+    counts = dict.fromkeys((key for key, _ in programme_labels), 0)
+    for row in month_by_programme_rows:
+        counts[row["programme"]] = int(row["c"] or 0)
+    max_count = max(counts.values()) or 1
+    month_by_programme = [
+        {
             "key": key,
             "label": label,
-            "count": count,
-            "pct": pct,
-        })
+            "count": counts[key],
+            "pct": counts[key] * 100 // max_count,
+        }
+        for key, label in programme_labels
+    ]
 
     followups_open = db.execute("""
         SELECT COUNT(*) c
@@ -3490,7 +3960,7 @@ def month():
 def day_detail(date_str):
     programme = request.args.get("programme", "lockwood")
     try:
-        selected = datetime.fromisoformat(date_str).date()
+        selected = date.fromisoformat(date_str)
     except ValueError:
         flash("Invalid date", "danger")
         return redirect(url_for("dashboard"))
@@ -3660,6 +4130,100 @@ def stats():
 # LEAVERS
 # ==========================================================
 
+# Shared statement text so sqlite3's per-connection statement cache (keyed on
+# the SQL string) and psycopg's auto-prepare reuse the same plan every request.
+_SQL_INSERT_LEAVER = """
+    INSERT INTO leavers (
+        child, programme, leave_month, leave_date,
+        class_day, session, class_name,
+        removed_la, removed_bg, added_to_board, reason,
+        email, source
+    )
+    VALUES (?,?,?,?,?,?,?,?,?,?,?,?,?)
+"""
+
+
+def _sql_weekday_name(column):
+    return (
+        f"CASE strftime('%w', {column})"
+        + "".join(f" WHEN '{idx}' THEN '{day_name}'" for idx, day_name in enumerate(SQL_DOW_NAMES))
+        + " ELSE '' END"
+    )
+
+
+# Leavers are counted per distinct (class_day, session, leave_date) in SQL;
+# leaver_day_name() then resolves each group's weekday with the whole-word
+# rules of extract_day_name(), so only one call runs per group.
+_SQL_LEAVERS_BY_MONTH = """
+    SELECT programme, class_day, session, leave_date, COUNT(*) AS c
+    FROM leavers
+    WHERE leave_month=?
+    GROUP BY programme, class_day, session, leave_date
+"""
+_SQL_MEMBERS_BY_MONTH = f"""
+    SELECT {_sql_weekday_name('taster_date')} AS day_name, programme, COUNT(*) AS c
+    FROM tasters
+    WHERE taster_date>=?
+      AND taster_date<?
+      AND attended=1
+      AND club_fees=1
+      AND bg=1
+      AND badge=1
+    GROUP BY day_name, programme
+"""
+_FOLLOWUP_COLUMNS = (
+    "id", "child", "programme", "taster_date", "session", "class_name",
+    "attended", "club_fees", "bg", "badge", "reschedule_contacted", "notes",
+)
+FollowupRow = namedtuple("FollowupRow", _FOLLOWUP_COLUMNS + ("day_name",))
+_SQL_FOLLOWUPS = """
+    SELECT
+        id, child, programme, taster_date, session, class_name,
+        attended, club_fees, bg, badge, reschedule_contacted, notes
+    FROM tasters
+    WHERE taster_date>=?
+      AND taster_date<=?
+      AND (attended=0 OR club_fees=0 OR bg=0 OR badge=0)
+      {assignment_filter}
+    ORDER BY taster_date DESC, programme, session, child
+"""
+
+
+def restrict_counts_to_assignments(sql, params, assignment_set):
+    # Wrap a (day_name, programme, c) aggregate so SQLite only returns assigned
+    # cells; rows with no resolved day ('') are kept for the unknown bucket.
+    if not assignment_set:
+        return sql, params
+    pairs = sorted(assignment_set)
+    values_sql = ", ".join("(?, ?)" for _ in pairs)
+    wrapped = f"""
+        WITH assign(assign_day, assign_programme) AS (VALUES {values_sql})
+        SELECT agg.day_name, agg.programme, agg.c
+        FROM ({sql}) agg
+        WHERE agg.day_name=''
+           OR EXISTS (
+                SELECT 1 FROM assign
+                WHERE assign_day=agg.day_name AND assign_programme=agg.programme
+           )
+    """
+    return wrapped, tuple(value for pair in pairs for value in pair) + tuple(params)
+
+
+def followups_query(cutoff_iso, today_iso, assignment_set):
+    # Fold assigned (day, programme) cells into the WHERE so only wanted rows
+    # come back; no assignments means every follow-up in the window.
+    params = (cutoff_iso, today_iso)
+    if not assignment_set:
+        return _SQL_FOLLOWUPS.format(assignment_filter=""), params
+    pairs = sorted(assignment_set)
+    clauses = " OR ".join(
+        "(programme=? AND strftime('%w', taster_date)=?)" for _ in pairs
+    )
+    for day_name, programme in pairs:
+        params += (programme, str(SQL_DOW_NAMES.index(day_name)))
+    return _SQL_FOLLOWUPS.format(assignment_filter=f"AND ({clauses})"), params
+
+
 @app.route("/leavers/add", methods=["GET", "POST"])
 def add_leaver():
     programme = request.args.get("programme", "preschool")
@@ -3693,7 +4257,7 @@ def add_leaver():
             return redirect(request.url)
 
         try:
-            leave_dt = datetime.fromisoformat(leave_date).date()
+            leave_dt = date.fromisoformat(leave_date)
             leave_month = leave_dt.strftime("%Y-%m")
             if not class_day:
                 class_day = leave_dt.strftime("%A")
@@ -3701,38 +4265,34 @@ def add_leaver():
             flash("Invalid leave date", "danger")
             return redirect(request.url)
 
+        inserted = {
+            "child": child,
+            "programme": programme,
+            "leave_month": leave_month,
+            "leave_date": leave_date,
+            "class_day": class_day,
+            "session": session_label,
+            "class_name": class_name,
+            "removed_la": removed_la,
+            "removed_bg": removed_bg,
+            "added_to_board": added_to_board,
+            "reason": reason,
+            "email": email,
+            "source": "manual",
+        }
         db = get_db()
-        db.execute("""
-            INSERT INTO leavers (
-                child, programme, leave_month, leave_date,
-                class_day, session, class_name,
-                removed_la, removed_bg, added_to_board, reason,
-                email, source
-            )
-            VALUES (?,?,?,?,?,?,?,?,?,?,?,?,?)
-        """, (
-            child,
-            programme,
-            leave_month,
-            leave_date,
-            class_day,
-            session_label,
-            class_name,
-            removed_la,
-            removed_bg,
-            added_to_board,
-            reason,
-            email,
-            "manual"
-        ))
-        leaver_id = db.execute("SELECT last_insert_rowid()").fetchone()[0]
-        db.commit()
-
-        inserted = db.execute("SELECT * FROM leavers WHERE id=?", (leaver_id,)).fetchone()
-        actor_initials = user_initials((current_user() or {}).get("full_name", ""))
+        with db:
+            cur = db.execute(_SQL_INSERT_LEAVER, tuple(inserted.values()))
+            leaver_id = cur.lastrowid
+        inserted["id"] = leaver_id
+
+        # Workbook round trip after the commit: it doesn't hold the write lock,
+        # and a failed sync can't roll back a leaver that is already saved. The
+        # one audit event then carries the final sync result.
         sync_msg = "Excel sync skipped"
         sync_status = "ok"
-        if sync_excel and inserted:
+        if sync_excel:
+            actor_initials = user_initials((current_user() or {}).get("full_name", ""))
             ok, sync_msg = sync_leaver_to_excel(inserted, actor_initials=actor_initials)
             if not ok:
                 flash(f"Leaver saved in app, but Excel sync needs review: {sync_msg}", "warning")
@@ -3752,7 +4312,7 @@ def add_leaver():
     week_start_raw = request.args.get("week_start") or request.args.get("leave_date")
     if week_start_raw:
         try:
-            anchor_date = datetime.fromisoformat(week_start_raw).date()
+            anchor_date = date.fromisoformat(week_start_raw)
         except ValueError:
             anchor_date = date.today()
     else:
@@ -3800,7 +4360,7 @@ def add_manual_leaver():
             return redirect(request.url)
 
         try:
-            leave_dt = datetime.fromisoformat(leave_date).date()
+            leave_dt = date.fromisoformat(leave_date)
             leave_month = leave_dt.strftime("%Y-%m")
         except ValueError:
             flash("Invalid leave date", "danger")
@@ -3810,15 +4370,7 @@ def add_manual_leaver():
             class_day = extract_day_name(session_label) or leave_dt.strftime("%A")
 
         db = get_db()
-        db.execute("""
-            INSERT INTO leavers (
-                child, programme, leave_month, leave_date,
-                class_day, session, class_name,
-                removed_la, removed_bg, added_to_board, reason,
-                email, source
-            )
-            VALUES (?,?,?,?,?,?,?,?,?,?,?,?,?)
-        """, (
+        db.execute(_SQL_INSERT_LEAVER, (
             child,
             programme,
             leave_month,
@@ -3859,7 +4411,7 @@ def add_manual_leaver():
     week_start_raw = request.args.get("week_start") or request.args.get("leave_date")
     if week_start_raw:
         try:
-            anchor_date = datetime.fromisoformat(week_start_raw).date()
+            anchor_date = date.fromisoformat(week_start_raw)
         except ValueError:
             anchor_date = date.today()
     else:
@@ -3889,73 +4441,72 @@ def admin_tasks():
     )
     assignment_set = {(a["day_name"], a["programme"]) for a in assignments_sorted}
 
+    # Small int pairs hash cheaper than name strings; programmes outside the
+    # known set get the next free index for this request.
+    programme_idx = dict(PROGRAMME_IDX)
+    programme_names = list(PROGRAMME_IDX)
+
     def key_for(day_name, programme):
-        return f"{day_name}|{programme}"
+        idx = programme_idx.get(programme)
+        if idx is None:
+            idx = programme_idx[programme] = len(programme_names)
+            programme_names.append(programme)
+        return (DAY_ORDER.get(day_name, 99), idx)
+
+    month_start = today_dt.replace(day=1)
+    next_month_start = (month_start + timedelta(days=32)).replace(day=1)
 
     db = get_db()
     leaver_count_map = {}
     unknown_leaver_counts = {}
-    leaver_rows = db.execute("""
-        SELECT child, programme, leave_date, class_day, session, class_name
-        FROM leavers
-        WHERE leave_month=?
-    """, (month_key,)).fetchall()
-    for row in leaver_rows:
-        row_dict = dict(row)
-        day_name = (
-            extract_day_name(row_dict.get("class_day"))
-            or extract_day_name(row_dict.get("session"))
-        )
-        leave_date = str(row_dict.get("leave_date") or "").strip()
-        if not day_name and leave_date:
-            try:
-                day_name = datetime.fromisoformat(leave_date).strftime("%A")
-            except ValueError:
-                day_name = ""
-        if not day_name:
-            unknown_key = key_for("?", row_dict["programme"])
-            unknown_leaver_counts[unknown_key] = unknown_leaver_counts.get(unknown_key, 0) + 1
-            continue
-        if assignment_set and (day_name, row_dict["programme"]) not in assignment_set:
-            continue
-        key = key_for(day_name, row_dict["programme"])
-        leaver_count_map[key] = leaver_count_map.get(key, 0) + 1
-
     member_count_map = {}
-    member_rows = db.execute("""
-        SELECT taster_date, programme
-        FROM tasters
-        WHERE strftime('%Y-%m', taster_date)=?
-          AND attended=1
-          AND club_fees=1
-          AND bg=1
-          AND badge=1
-    """, (month_key,)).fetchall()
-    for row in member_rows:
-        day_name = datetime.fromisoformat(row["taster_date"]).strftime("%A")
-        if assignment_set and (day_name, row["programme"]) not in assignment_set:
-            continue
-        key = key_for(day_name, row["programme"])
-        member_count_map[key] = member_count_map.get(key, 0) + 1
-
     followup_rows = []
-    raw_followups = db.execute("""
-        SELECT
-            id, child, programme, taster_date, session, class_name,
-            attended, club_fees, bg, badge, reschedule_contacted, notes
-        FROM tasters
-        WHERE taster_date>=?
-          AND taster_date<=?
-          AND (attended=0 OR club_fees=0 OR bg=0 OR badge=0)
-        ORDER BY taster_date DESC, programme, session, child
-    """, (cutoff_iso, today_iso)).fetchall()
-    for row in raw_followups:
-        row_dict = dict(row)
-        day_name = datetime.fromisoformat(row["taster_date"]).strftime("%A")
-        if assignment_set and (day_name, row["programme"]) not in assignment_set:
-            continue
-        row_dict["day_name"] = day_name
-        followup_rows.append(row_dict)
+    # Cheap probe so quiet months skip the aggregate scans entirely.
+    has_rows = db.execute(
+        """
+        SELECT (
+            EXISTS(SELECT 1 FROM tasters WHERE taster_date>=?)
+            OR EXISTS(SELECT 1 FROM leavers WHERE leave_month=?)
+        ) AS has_rows
+        """,
+        (cutoff_iso, month_key),
+    ).fetchone()["has_rows"]
+    if has_rows:
+        leaver_rows = db.execute(_SQL_LEAVERS_BY_MONTH, (month_key,)).fetchall()
+        for row in leaver_rows:
+            count = int(row["c"] or 0)
+            day_name = leaver_day_name(row["class_day"], row["session"], row["leave_date"])
+            if not day_name:
+                unknown_key = key_for("?", row["programme"])
+                unknown_leaver_counts[unknown_key] = unknown_leaver_counts.get(unknown_key, 0) + count
+                continue
+            if assignment_set and (day_name, row["programme"]) not in assignment_set:
+                continue
+            key = key_for(day_name, row["programme"])
+            leaver_count_map[key] = leaver_count_map.get(key, 0) + count
+
+        member_rows = db.execute(*restrict_counts_to_assignments(
+            _SQL_MEMBERS_BY_MONTH,
+            (month_start.isoformat(), next_month_start.isoformat()),
+            assignment_set,
+        )).fetchall()
+        for row in member_rows:
+            day_name = row["day_name"]
+            if not day_name:
+                continue
+            key = key_for(day_name, row["programme"])
+            member_count_map[key] = member_count_map.get(key, 0) + int(row["c"] or 0)
+
+        raw_followups = db.execute(
+            *followups_query(cutoff_iso, today_iso, assignment_set)
+        ).fetchall()
+        day_of = weekday_lookup(row["taster_date"] for row in raw_followups)
+
+        for row in raw_followups:
+            followup_rows.append(FollowupRow(
+                *(row[col] for col in _FOLLOWUP_COLUMNS),
+                day_of[row["taster_date"]],
+            ))
 
     if assignments_sorted:
         summary_rows = []
@@ -3964,38 +4515,32 @@ def admin_tasks():
             summary_rows.append({
                 "day_name": a["day_name"],
                 "programme": a["programme"],
-                "key": key,
+                "key": f"{a['day_name']}|{a['programme']}",
                 "leavers": leaver_count_map.get(key, 0),
                 "members": member_count_map.get(key, 0),
             })
+    elif not (leaver_count_map or member_count_map or followup_rows):
+        summary_rows = []
     else:
         keys = set(leaver_count_map.keys()) | set(member_count_map.keys())
         for row in followup_rows:
-            keys.add(key_for(row["day_name"], row["programme"]))
+            keys.add(key_for(row.day_name, row.programme))
         summary_rows = []
-        for key in sorted(
-            keys,
-            key=lambda k: (
-                DAY_ORDER.get(k.split("|", 1)[0], 99),
-                k.split("|", 1)[1]
-            )
-        ):
-            day_name, programme = key.split("|", 1)
+        for key in sorted(keys):
+            day_name = WEEKDAY_NAMES[key[0]] if key[0] < len(WEEKDAY_NAMES) else ""
+            programme = programme_names[key[1]]
             summary_rows.append({
                 "day_name": day_name,
                 "programme": programme,
-                "key": key,
+                "key": f"{day_name}|{programme}",
                 "leavers": leaver_count_map.get(key, 0),
                 "members": member_count_map.get(key, 0),
             })
 
-    unknown_summary = []
-    for key, count in sorted(unknown_leaver_counts.items()):
-        _, programme = key.split("|", 1)
-        unknown_summary.append({
-            "programme": programme,
-            "count": count,
-        })
+    unknown_summary = [
+        {"programme": programme_names[programme], "count": count}
+        for (_, programme), count in sorted(unknown_leaver_counts.items())
+    ] if unknown_leaver_counts else []
 
     return render_template(
         "admin_tasks.html",
@@ -4014,24 +4559,31 @@ def admin_tasks():
 @app.post("/admin/tasks/contact/<int:taster_id>")
 def admin_mark_contacted(taster_id):
     db = get_db()
-    row = db.execute("SELECT * FROM tasters WHERE id=?", (taster_id,)).fetchone()
-    if not row:
+    if DB_SUPPORTS_RETURNING:
+        with db:
+            updated_row = db.execute(
+                "UPDATE tasters SET reschedule_contacted=1 WHERE id=? RETURNING *",
+                (taster_id,),
+            ).fetchone()
+    else:
+        cur = db.execute("UPDATE tasters SET reschedule_contacted=1 WHERE id=?", (taster_id,))
+        db.commit()
+        updated_row = (
+            db.execute("SELECT * FROM tasters WHERE id=?", (taster_id,)).fetchone()
+            if cur.rowcount
+            else None
+        )
+    if not updated_row:
         flash("Taster not found.", "warning")
         return redirect(request.referrer or url_for("admin_tasks"))
-    db.execute("UPDATE tasters SET reschedule_contacted=1 WHERE id=?", (taster_id,))
-    db.commit()
-    updated_row = db.execute("SELECT * FROM tasters WHERE id=?", (taster_id,)).fetchone()
-    sync_ok = True
-    sync_msg = "Excel sync skipped"
-    if updated_row:
-        initials = user_initials((current_user() or {}).get("full_name", ""))
-        sync_ok, sync_msg = sync_taster_to_excel(
-            updated_row,
-            mode="contacted",
-            actor_initials=initials
-        )
-        if not sync_ok:
-            flash(f"Marked contacted in app, but Excel sync needs review: {sync_msg}", "warning")
+    initials = user_initials((current_user() or {}).get("full_name", ""))
+    sync_ok, sync_msg = sync_taster_to_excel(
+        updated_row,
+        mode="contacted",
+        actor_initials=initials
+    )
+    if not sync_ok:
+        flash(f"Marked contacted in app, but Excel sync needs review: {sync_msg}", "warning")
     log_audit(
         "mark_no_show_contacted",
         entity_type="taster",
@@ -4105,7 +4657,7 @@ def account_settings():
                 return redirect(url_for("account_settings"))
             db.execute(
                 "UPDATE users SET password_hash=?, password_must_change=0 WHERE id=?",
-                (generate_password_hash(new_password), user["id"])
+                (hash_password(new_password), user["id"])
             )
             db.commit()
             session.pop("must_change_password", None)
@@ -4134,14 +4686,8 @@ def account_settings():
 
         if action == "admin_days":
             selected_values = parse_admin_day_values(request.form.getlist("admin_days"))
-            db.execute("DELETE FROM user_admin_days WHERE user_id=?", (user["id"],))
-            for day_name, programme in selected_values:
-                db.execute("""
-                    INSERT INTO user_admin_days (user_id, day_name, programme)
-                    VALUES (?, ?, ?)
-                    ON CONFLICT(user_id, day_name, programme) DO NOTHING
-                """, (user["id"], day_name, programme))
-            db.commit()
+            with db:
+                replace_user_admin_days(db, user["id"], selected_values)
             log_audit(
                 "update_admin_days",
                 entity_type="user",
@@ -4198,29 +4744,22 @@ def account_admin():
             if role not in {"admin", "staff"}:
                 role = "staff"
 
-            existing = db.execute(
-                "SELECT id FROM users WHERE username=?",
-                (username,)
-            ).fetchone()
-            if existing:
-                flash("That email is already used by another account.", "warning")
-                return redirect(url_for("account_admin"))
-
             default_password = os.environ.get("TASTERIST_DEFAULT_USER_PASSWORD", "JamesRocks1946!").strip()
             temporary_password = default_password or secrets.token_urlsafe(10)
-            db.execute("""
-                INSERT INTO users (username, password_hash, full_name, role, password_must_change)
-                VALUES (?, ?, ?, ?, 0)
-            """, (username, generate_password_hash(temporary_password), full_name, role))
-            target_user_id = db.execute("SELECT last_insert_rowid()").fetchone()[0]
-
-            for day_name, programme in selected_values:
-                db.execute("""
-                    INSERT INTO user_admin_days (user_id, day_name, programme)
-                    VALUES (?, ?, ?)
-                    ON CONFLICT(user_id, day_name, programme) DO NOTHING
-                """, (target_user_id, day_name, programme))
-            db.commit()
+            # Hash before opening the transaction so the write lock is not held while hashing.
+            password_hash = hash_password(temporary_password)
+            try:
+                with db:
+                    cur = db.execute("""
+                        INSERT INTO users (username, password_hash, full_name, role, password_must_change)
+                        VALUES (?, ?, ?, ?, 0)
+                    """, (username, password_hash, full_name, role))
+                    target_user_id = cur.lastrowid
+                    replace_user_admin_days(db, target_user_id, selected_values)
+            except DB_INTEGRITY_ERRORS:
+                # users.username is UNIQUE; let the constraint catch duplicates.
+                flash("That email is already used by another account.", "warning")
+                return redirect(url_for("account_admin"))
             log_audit(
                 "admin_create_user",
                 entity_type="user",
@@ -4297,14 +4836,6 @@ def account_admin():
             if target_role == "owner":
                 role = "owner"
 
-            username_conflict = db.execute(
-                "SELECT id FROM users WHERE username=? AND id<>?",
-                (username, target_user_id)
-            ).fetchone()
-            if username_conflict:
-                flash("That email is already used by another account.", "warning")
-                return redirect(url_for("account_admin"))
-
             if admin_user and target_user_id == admin_user["id"] and role not in {"admin", "owner"}:
                 flash("You cannot remove your own admin role.", "warning")
                 return redirect(url_for("account_admin"))
@@ -4325,25 +4856,22 @@ def account_admin():
                         flash("New password " + "; ".join(password_errors) + ".", "warning")
                         return redirect(url_for("account_admin"))
 
-            db.execute(
-                "UPDATE users SET full_name=?, username=?, role=? WHERE id=?",
-                (full_name, username, role, target_user_id)
-            )
-            if new_password:
-                db.execute(
-                    "UPDATE users SET password_hash=?, password_must_change=0 WHERE id=?",
-                    (generate_password_hash(new_password), target_user_id)
-                )
-
-            db.execute("DELETE FROM user_admin_days WHERE user_id=?", (target_user_id,))
-            for day_name, programme in selected_values:
-                db.execute("""
-                    INSERT INTO user_admin_days (user_id, day_name, programme)
-                    VALUES (?, ?, ?)
-                    ON CONFLICT(user_id, day_name, programme) DO NOTHING
-                """, (target_user_id, day_name, programme))
-
-            db.commit()
+            password_hash = hash_password(new_password) if new_password else None
+            try:
+                with db:
+                    db.execute(
+                        "UPDATE users SET full_name=?, username=?, role=? WHERE id=?",
+                        (full_name, username, role, target_user_id)
+                    )
+                    if password_hash:
+                        db.execute(
+                            "UPDATE users SET password_hash=?, password_must_change=0 WHERE id=?",
+                            (password_hash, target_user_id)
+                        )
+                    replace_user_admin_days(db, target_user_id, selected_values)
+            except DB_INTEGRITY_ERRORS:
+                flash("That email is already used by another account.", "warning")
+                return redirect(url_for("account_admin"))
             details = f"Updated {username} role={role} admin_days={len(selected_values)}"
             if new_password:
                 details += " password=changed"
@@ -4365,22 +4893,27 @@ def account_admin():
         ORDER BY created_at DESC, id DESC
         LIMIT 500
     """).fetchall()
-    user_rows = db.execute("""
-        SELECT id, username, full_name, role, password_must_change, created_at
-        FROM users
-        ORDER BY username
-    """).fetchall()
-    day_rows = db.execute("""
-        SELECT user_id, day_name, programme
-        FROM user_admin_days
-        ORDER BY user_id, day_name, programme
+    # Postgres has no group_concat; string_agg is its equivalent.
+    cells_agg = "string_agg" if USING_POSTGRES else "group_concat"
+    user_rows = db.execute(f"""
+        SELECT
+            u.id, u.username, u.full_name, u.role, u.password_must_change, u.created_at,
+            {cells_agg}(uad.day_name || '|' || uad.programme, ';') AS cells
+        FROM users u
+        LEFT JOIN user_admin_days uad ON uad.user_id=u.id
+        GROUP BY u.id, u.username, u.full_name, u.role, u.password_must_change, u.created_at
+        ORDER BY u.username
     """).fetchall()
     assignment_map = {}
-    for row in day_rows:
-        key = row["user_id"]
-        if not admin_day_cell_allowed(row["day_name"], row["programme"]):
+    for row in user_rows:
+        if not row["cells"]:
             continue
-        assignment_map.setdefault(key, set()).add(f"{row['day_name']}|{row['programme']}")
+        allowed = {
+            cell for cell in row["cells"].split(";")
+            if admin_day_cell_allowed(*cell.split("|", 1))
+        }
+        if allowed:
+            assignment_map[row["id"]] = allowed
 
     grouped_options = build_admin_day_grouped_options()
 
@@ -4493,15 +5026,7 @@ def all_tasters():
             return False
         return bool(re.search(r"[^A-Za-z0-9\s\-\&\(\)\/\.,:'\"]", text))
 
-    tasters_raw = query("""
-        SELECT
-            id, child, programme, location, session, class_name,
-            taster_date, attended, bg, badge, notes
-        FROM tasters
-        ORDER BY taster_date DESC, child
-    """)
-    tasters = []
-    for row in tasters_raw:
+    def decorate_taster_row(row):
         item = dict(row)
         class_name = str(item.get("class_name") or "").strip()
         session_text = str(item.get("session") or "").strip()
@@ -4528,15 +5053,9 @@ def all_tasters():
             unknown_class = True
         item["unknown_class"] = 1 if unknown_class else 0
         item["diagnostic_text"] = " | ".join(issues)
-        tasters.append(item)
+        return item
 
-    leavers_raw = query("""
-        SELECT child, programme, leave_month, leave_date, class_day, session, class_name, email, source
-        FROM leavers
-        ORDER BY leave_month DESC, leave_date DESC, child
-    """)
-    leavers = []
-    for row in leavers_raw:
+    def decorate_leaver_row(row):
         item = dict(row)
         class_name = str(item.get("class_name") or "").strip()
         class_day = str(item.get("class_day") or "").strip()
@@ -4574,8 +5093,29 @@ def all_tasters():
         item["unknown_class"] = 1 if unknown_class else 0
         item["diagnostic_text"] = " | ".join(issues)
         item["resolved_day"] = inferred_day or "?"
-        leavers.append(item)
+        return item
+
+    tasters = [
+        decorate_taster_row(row)
+        for row in query("""
+            SELECT
+                id, child, programme, location, session, class_name,
+                taster_date, attended, bg, badge, notes
+            FROM tasters
+            ORDER BY taster_date DESC, child
+        """)
+    ]
+    leavers = [
+        decorate_leaver_row(row)
+        for row in query("""
+            SELECT child, programme, leave_month, leave_date, class_day, session, class_name, email, source
+            FROM leavers
+            ORDER BY leave_month DESC, leave_date DESC, child
+        """)
+    ]
 
+    # Rendered in full: base.html pops flashes and may mint the CSRF token,
+    # and a streamed body would run after the session cookie is saved.
     return render_template("all_tasters.html", tasters=tasters, leavers=leavers)
 
 
@@ -4735,6 +5275,23 @@ def delete_taster(taster_id):
 # ADD TASTER
 # ==========================================================
 
+_SQL_INSERT_TASTER = """
+    INSERT INTO tasters
+    (child, programme, location, session, class_name, taster_date, notes)
+    VALUES (?,?,?,?,?,?,?)
+"""
+
+
+def insert_taster(db, values):
+    # One round-trip where RETURNING is available; otherwise insert then re-read.
+    if DB_SUPPORTS_RETURNING:
+        with db:
+            return db.execute(_SQL_INSERT_TASTER + " RETURNING *", values).fetchone()
+    with db:
+        taster_id = db.execute(_SQL_INSERT_TASTER, values).lastrowid
+    return db.execute("SELECT * FROM tasters WHERE id=?", (taster_id,)).fetchone()
+
+
 @app.route("/add", methods=["GET", "POST"])
 def add():
     programme = request.args.get("programme", "lockwood")
@@ -4767,11 +5324,7 @@ def add():
             flash(reason, "warning")
             return redirect(request.url)
 
-        db.execute("""
-            INSERT INTO tasters
-            (child, programme, location, session, class_name, taster_date, notes)
-            VALUES (?,?,?,?,?,?,?)
-        """, (
+        inserted = insert_taster(db, (
             child,
             programme,
             programme.title(),
@@ -4780,10 +5333,7 @@ def add():
             taster_date,
             notes,
         ))
-        taster_id = db.execute("SELECT last_insert_rowid()").fetchone()[0]
-        db.commit()
-
-        inserted = db.execute("SELECT * FROM tasters WHERE id=?", (taster_id,)).fetchone()
+        taster_id = inserted["id"]
         actor_initials = user_initials((current_user() or {}).get("full_name", ""))
         sync_msg = "Excel sync skipped"
         sync_status = "ok"
@@ -4807,7 +5357,7 @@ def add():
     week_start_raw = request.args.get("week_start") or request.args.get("taster_date")
     if week_start_raw:
         try:
-            anchor_date = datetime.fromisoformat(week_start_raw).date()
+            anchor_date = date.fromisoformat(week_start_raw)
         except ValueError:
             anchor_date = date.today()
     else:
@@ -4855,11 +5405,7 @@ def add_manual_taster():
             flash(reason, "warning")
             return redirect(request.url)
 
-        db.execute("""
-            INSERT INTO tasters
-            (child, programme, location, session, class_name, taster_date, notes)
-            VALUES (?,?,?,?,?,?,?)
-        """, (
+        inserted = insert_taster(db, (
             child,
             programme,
             programme.title(),
@@ -4868,10 +5414,7 @@ def add_manual_taster():
             taster_date,
             notes,
         ))
-        taster_id = db.execute("SELECT last_insert_rowid()").fetchone()[0]
-        db.commit()
-
-        inserted = db.execute("SELECT * FROM tasters WHERE id=?", (taster_id,)).fetchone()
+        taster_id = inserted["id"]
         actor_initials = user_initials((current_user() or {}).get("full_name", ""))
         sync_msg = "Excel sync skipped"
         sync_status = "ok"
@@ -4895,7 +5438,7 @@ def add_manual_taster():
     week_start_raw = request.args.get("week_start") or request.args.get("taster_date")
     if week_start_raw:
         try:
-            anchor_date = datetime.fromisoformat(week_start_raw).date()
+            anchor_date = date.fromisoformat(week_start_raw)
         except ValueError:
             anchor_date = date.today()
     else:
@@ -4955,7 +5498,7 @@ def cloud_preflight():
         {
             "name": "Import Sheets Folder",
             "path": str(sheets_path),
-            "ok": sheets_path.exists() and os.access(sheets_path, os.R_OK),
+            "ok": path_access_ok(sheets_path, os.R_OK),
             "detail": "Folder must be readable in cloud for imports.",
         },
         {
@@ -4978,13 +5521,13 @@ def cloud_preflight():
         checks.insert(1, {
             "name": "Database Directory",
             "path": str(db_parent),
-            "ok": db_parent.exists() and os.access(db_parent, os.W_OK),
+            "ok": path_access_ok(db_parent, os.W_OK),
             "detail": "Must exist and be writable by the app process.",
         })
         checks.insert(2, {
             "name": "Database File",
             "path": str(db_path),
-            "ok": (db_path.exists() and os.access(db_path, os.W_OK)) or (not db_path.exists() and os.access(db_parent, os.W_OK)),
+            "ok": path_access_ok(db_path, os.W_OK) or (not db_path.exists() and path_access_ok(db_parent, os.W_OK)),
             "detail": "Either writable existing file or writable parent for first create.",
         })
     if postgres_url:
@@ -5102,25 +5645,49 @@ def cloud_backup():
     tmp_file_path = tmp_file.name
     tmp_file.close()
 
-    src = sqlite3.connect(DB_FILE, timeout=max(5, SQLITE_BUSY_TIMEOUT_MS // 1000))
+    # Autocommit so no implicit read transaction is held around the backup; the
+    # copy goes 1024 pages at a time so writers can slip in between steps.
+    src = sqlite3.connect(
+        DB_FILE,
+        timeout=max(5, SQLITE_BUSY_TIMEOUT_MS // 1000),
+        isolation_level=None,
+    )
     src.execute(f"PRAGMA busy_timeout = {SQLITE_BUSY_TIMEOUT_MS}")
     try:
-        dst = sqlite3.connect(tmp_file_path, timeout=max(5, SQLITE_BUSY_TIMEOUT_MS // 1000))
+        dst = sqlite3.connect(
+            tmp_file_path,
+            timeout=max(5, SQLITE_BUSY_TIMEOUT_MS // 1000),
+            isolation_level=None,
+        )
         dst.execute(f"PRAGMA busy_timeout = {SQLITE_BUSY_TIMEOUT_MS}")
+        # Throwaway temp file: skip fsyncs, and keep the default rollback journal
+        # so the downloaded .db is self-contained (no -wal sidecar).
+        dst.execute("PRAGMA synchronous=OFF")
         try:
-            src.backup(dst)
+            src.backup(dst, pages=1024, sleep=0.01)
         finally:
             dst.close()
     finally:
         src.close()
 
-    return send_file(
+    # Serve by path so Werkzeug sends Content-Length and honours Range.
+    response = send_file(
         tmp_file_path,
         as_attachment=True,
         download_name=backup_name,
-        mimetype="application/octet-stream"
+        mimetype="application/octet-stream",
+        conditional=True,
     )
 
+    def remove_tmp_file():
+        try:
+            os.remove(tmp_file_path)
+        except OSError:
+            pass
+
+    response.call_on_close(remove_tmp_file)
+    return response
+
 
 @app.route("/export/tasters/app-added.csv")
 @admin_required
@@ -5195,16 +5762,17 @@ def import_page():
     db_path = Path(DB_FILE)
     import_source = get_import_source_folder()
     import_root = Path(import_source).expanduser()
-    xlsx_count = 0
-    if import_root.exists():
-        xlsx_count = len([
-            f for f in import_root.rglob("*.xlsx")
-            if not f.name.startswith("~$")
-        ])
+    xlsx_count = count_import_workbooks(import_root)
+    counts = db.execute("""
+        SELECT
+            (SELECT COUNT(*) FROM users) AS user_count,
+            (SELECT COUNT(*) FROM tasters) AS taster_count,
+            (SELECT COUNT(*) FROM leavers) AS leaver_count
+    """).fetchone()
     stats = {
-        "user_count": db.execute("SELECT COUNT(*) c FROM users").fetchone()["c"],
-        "taster_count": db.execute("SELECT COUNT(*) c FROM tasters").fetchone()["c"],
-        "leaver_count": db.execute("SELECT COUNT(*) c FROM leavers").fetchone()["c"],
+        "user_count": counts["user_count"],
+        "taster_count": counts["taster_count"],
+        "leaver_count": counts["leaver_count"],
         "db_file": redact_database_url(DATABASE_URL) if USING_POSTGRES else str(db_path),
         "db_exists": True if USING_POSTGRES else db_path.exists(),
         "db_backend": DB_BACKEND,
@@ -5214,6 +5782,7 @@ def import_page():
     }
     return render_template(
         "import.html",
+        import_job=running_import_job(),
         last_import=load_last_import_data(),
         import_source=import_source,
         storage_stats=stats,
@@ -5250,8 +5819,12 @@ def import_upload():
         target_dir = import_root / m.group(1) if m else import_root
         target_dir.mkdir(parents=True, exist_ok=True)
         target_path = target_dir / safe_name
-        f.save(target_path)
+        with open(target_path, "wb", buffering=FILE_COPY_CHUNK_BYTES) as out:
+            shutil.copyfileobj(f.stream, out, length=FILE_COPY_CHUNK_BYTES)
         saved += 1
+    _xlsx_count_cache.clear()
+    if saved:
+        write_import_manifest(import_root)
 
     if saved == 0:
         flash("No valid .xlsx files uploaded.", "warning")
@@ -5266,20 +5839,17 @@ def import_upload():
         replace = replace_requested and destructive_imports_enabled()
         if replace_requested and not replace:
             flash("Replace-all import is disabled in this environment.", "warning")
-        rc, _ = run_import_process(trigger="upload", replace=replace)
-        log_audit(
-            "run_import",
-            entity_type="system",
-            entity_id="upload",
-            details=f"Import trigger=upload replace={1 if replace else 0} rc={rc}",
-            status="ok" if rc == 0 else "warn",
-        )
-        if rc == 0:
-            flash("Import complete after upload.", "success")
-        elif rc == 2 and USING_POSTGRES:
+        _, started = start_import_job(trigger="upload", replace=replace, queue_follow_up=True)
+        if USING_POSTGRES:
             flash("Upload complete. Import execution is disabled in Postgres runtime.", "warning")
+        elif started:
+            flash("Import started after upload. This page updates when it finishes.", "info")
         else:
-            flash("Upload complete, but import finished with warnings/errors.", "warning")
+            flash(
+                "An import is already running, so no import was started for this upload. "
+                "Another import is queued to run once it finishes.",
+                "info",
+            )
 
     return redirect(url_for("import_page"))
 
@@ -5295,23 +5865,31 @@ def import_run():
     replace = replace_requested and destructive_imports_enabled()
     if replace_requested and not replace:
         flash("Replace-all import is disabled in this environment.", "warning")
-    rc, _ = run_import_process(trigger="manual", replace=replace)
-    log_audit(
-        "run_import",
-        entity_type="system",
-        entity_id="manual",
-        details=f"Import trigger=manual replace={1 if replace else 0} rc={rc}",
-        status="ok" if rc == 0 else "warn",
-    )
-    if rc == 0:
-        flash("Import complete", "success")
-    elif rc == 2 and USING_POSTGRES:
+    _, started = start_import_job(trigger="manual", replace=replace)
+    if USING_POSTGRES:
         flash("Import execution is disabled in Postgres runtime.", "warning")
+    elif started:
+        flash("Import started. This page updates when it finishes.", "info")
     else:
-        flash("Import finished with warnings/errors. Check the log.", "warning")
+        flash("An import is already running.", "info")
     return redirect(url_for("import_page"))
 
 
+@app.get("/import/status/<job_id>")
+@admin_required
+def import_status(job_id):
+    state = load_import_job_state()
+    if not state or state.get("job_id") != job_id:
+        return {"job_id": job_id, "state": "unknown"}, 404
+    if state.get("state") == "running" and not running_import_job():
+        return {"job_id": job_id, "state": "stale"}
+    return {
+        "job_id": job_id,
+        "state": state.get("state"),
+        "exit_code": state.get("exit_code"),
+    }
+
+
 @app.route("/dev", methods=["GET", "POST"])
 def dev_panel():
     if not is_env_true("TASTERIST_DEV_TOOLS_ENABLED", "0"):
@@ -0,0 +1,4 @@
+# PRAGMA user_version that app.py stamps on a SQLite file once its column
+# back-fills have run. Bump when adding a back-fill to _init_db_once so existing
+# files re-run it; the import scripts read the same value to skip their checks.
+SQLITE_SCHEMA_VERSION = 1
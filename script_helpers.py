@@ -0,0 +1,32 @@
+# Helpers shared by the tools in scripts/. They live outside app.py because
+# importing app initialises the app's own database.
+import sqlite3
+
+BUSY_TIMEOUT_MS = 60000
+
+
+def calamine_available():
+    try:
+        import python_calamine  # noqa: F401
+    except ImportError:
+        return False
+    return True
+
+
+def open_conn(path, cached_statements=128, bulk_load=False):
+    # The app runs these scripts against its live database, so stay in WAL
+    # (readers keep working), only drop the per-commit fsync, and wait out the
+    # app's writes with busy_timeout. Bulk loads also keep temp tables in memory
+    # and get a 64 MiB page cache.
+    conn = sqlite3.connect(
+        path,
+        timeout=BUSY_TIMEOUT_MS / 1000,
+        cached_statements=cached_statements,
+    )
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA synchronous=NORMAL")
+    conn.execute(f"PRAGMA busy_timeout={BUSY_TIMEOUT_MS}")
+    if bulk_load:
+        conn.execute("PRAGMA temp_store=MEMORY")
+        conn.execute("PRAGMA cache_size=-65536")
+    return conn
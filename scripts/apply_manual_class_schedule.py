@@ -136,6 +136,19 @@ SCHEDULE = {
 }
 
 
+SOURCE_FILE = "manual_schedule_2026_02_19"
+PROGRAMMES = ("lockwood", "honley")
+
+INSERT_SQL = """
+    INSERT INTO class_sessions
+    (programme, location, session_date, day, class_name, start_time, end_time, source_file)
+    VALUES {values}
+"""
+ROW_PLACEHOLDER = "(?,?,?,?,?,?,?,?)"
+# 100 rows x 8 columns stays under SQLite's historical 999 bound-variable cap.
+INSERT_CHUNK_ROWS = 100
+
+
 def programme_for_class(class_name: str) -> str:
     lower = class_name.lower()
     if "lockwood" in lower:
@@ -156,49 +169,56 @@ def hhmmss(value: str) -> str:
     return text
 
 
-def main():
-    conn = app.open_db_connection()
-    cur = conn.cursor()
-
-    before = int(cur.execute(
-        "SELECT COUNT(*) FROM class_sessions WHERE lower(programme) IN ('lockwood','honley')"
-    ).fetchone()[0] or 0)
+def insert_rows(cur, rows):
+    # Multi-row VALUES: one statement per chunk rather than one per row.
+    for start in range(0, len(rows), INSERT_CHUNK_ROWS):
+        chunk = rows[start:start + INSERT_CHUNK_ROWS]
+        sql = INSERT_SQL.format(values=",".join([ROW_PLACEHOLDER] * len(chunk)))
+        cur.execute(sql, [value for row in chunk for value in row])
 
-    cur.execute("DELETE FROM class_sessions WHERE lower(programme) IN ('lockwood','honley')")
 
-    inserted = 0
-    per_day = Counter()
-    per_programme = Counter()
-    for day_name, entries in SCHEDULE.items():
+def resolve_schedule(schedule):
+    rows = []
+    for day_name, entries in schedule.items():
         for class_name, start_time, end_time in entries:
             programme = programme_for_class(class_name)
-            location = location_for_programme(programme)
-            cur.execute(
-                """
-                INSERT INTO class_sessions
-                (programme, location, session_date, day, class_name, start_time, end_time, source_file)
-                VALUES (?,?,?,?,?,?,?,?)
-                """,
-                (
-                    programme,
-                    location,
-                    "",
-                    day_name,
-                    class_name,
-                    hhmmss(start_time),
-                    hhmmss(end_time),
-                    "manual_schedule_2026_02_19",
-                ),
-            )
-            inserted += 1
-            per_day[day_name] += 1
-            per_programme[programme] += 1
+            rows.append((
+                programme,
+                location_for_programme(programme),
+                "",
+                day_name,
+                class_name,
+                hhmmss(start_time),
+                hhmmss(end_time),
+                SOURCE_FILE,
+            ))
+    return rows
+
+
+# SCHEDULE is static, so its insert rows are resolved once at import.
+SCHEDULE_ROWS = resolve_schedule(SCHEDULE)
+
+
+def main():
+    conn = app.open_db_connection()
+    cur = conn.cursor()
+
+    # The DELETE's rowcount is the old row count; no separate COUNT scan.
+    # Both class_sessions writers store programme lower-cased, so match it
+    # directly and let uniq_class_session (programme first) find the rows.
+    before = cur.execute(
+        "DELETE FROM class_sessions WHERE programme IN (?,?)", PROGRAMMES
+    ).rowcount
 
+    # Bulk insert inside the same transaction as the DELETE.
+    insert_rows(cur, SCHEDULE_ROWS)
     conn.commit()
 
-    after = int(cur.execute(
-        "SELECT COUNT(*) FROM class_sessions WHERE lower(programme) IN ('lockwood','honley')"
-    ).fetchone()[0] or 0)
+    inserted = len(SCHEDULE_ROWS)
+    per_day = Counter(row[3] for row in SCHEDULE_ROWS)
+    per_programme = Counter(row[0] for row in SCHEDULE_ROWS)
+    # Every matching row was deleted in this transaction, so only ours remain.
+    after = inserted
     conn.close()
 
     print(f"Backend: {app.DB_BACKEND}")
@@ -5,64 +5,88 @@ Counts likely taster records in exported CSVs
 NO database writes
 """
 
+import io
+import os
 from pathlib import Path
-import csv
-import re
+
+import pandas as pd
 
 BASE_DIR = Path(__file__).resolve().parents[1]
 
 
-def looks_like_name(value: str) -> bool:
-    # Broad filter: starts with a letter and is not a common header token.
-    if not value:
-        return False
-    s = value.strip()
-    if not s:
-        return False
-    if s.lower() in {
-        "name", "tasters", "leavers",
-        "monday", "tuesday", "wednesday",
-        "thursday", "friday", "saturday", "sunday"
-    }:
-        return False
-    if re.match(r"^\d{1,2}:\d{2}", s):
-        return False
-    return bool(re.match(r"^[A-Za-z]", s))
+# Tokens that fill the Name column without being a child's name.
+HEADER_TOKENS = frozenset({
+    "name", "tasters", "leavers",
+    "monday", "tuesday", "wednesday",
+    "thursday", "friday", "saturday", "sunday",
+})
 
 
-def count_csv(path: Path) -> int:
-    with open(path, newline="", encoding="utf-8") as f:
-        rows = list(csv.reader(f))
+def normalise_frame(frame):
+    return frame.apply(lambda col: col.str.strip().str.lower())
 
-    if not rows:
-        return 0
-
-    header_row_idx = None
-    name_cols = []
-    for i, row in enumerate(rows[:20]):
-        cols = [
-            idx for idx, cell in enumerate(row)
-            if isinstance(cell, str) and cell.strip().lower() == "name"
-        ]
-        if cols:
-            header_row_idx = i
-            name_cols = cols
-            break
-
-    if header_row_idx is None:
-        return 0
 
-    count = 0
-    for row in rows[header_row_idx + 1:]:
-        if any((cell or "").strip().lower() == "leavers" for cell in row):
-            break
+def csv_width(text: str) -> int:
+    # read_csv takes its column count from the first line and rejects longer
+    # rows later on, so size the frame from the widest row up front. Every
+    # other '"'-split piece is quoted text; collapsing those leaves only the
+    # real separators to count. df.to_csv only quotes cells that need it, so
+    # most exports have no quotes and are split as they are. Blank lines are
+    # empty rows, not one-cell ones.
+    if '"' in text:
+        text = "q".join(text.split('"')[::2])
+    lines = text.split("\n")
+    return max((line.count(",") + 1 for line in lines if line.strip("\r")), default=0)
 
-        for col in name_cols:
-            name = row[col].strip() if col < len(row) and row[col] else ""
-            date_val = row[col + 1].strip() if col + 1 < len(row) and row[col + 1] else ""
-            if looks_like_name(name) and date_val:
-                count += 1
 
+def count_csv(path: Path) -> int:
+    text = path.read_text(encoding="utf-8")
+    width = csv_width(text)
+    if not width:
+        return 0
+    df = pd.read_csv(
+        io.StringIO(text),
+        header=None,
+        names=list(range(width)),
+        dtype=str,
+        keep_default_na=False,
+        skip_blank_lines=False,
+    ).fillna("")  # short rows pad with NaN; treat them as empty cells
+
+    # Header: first of the top 20 rows with a "name" cell. Only those rows
+    # are normalised until a header is found, so header-less files bail out
+    # without touching the rest of the sheet.
+    name_hits = normalise_frame(df.iloc[:20]) == "name"
+    header_rows = name_hits.any(axis=1)
+    if not header_rows.any():
+        return 0
+    header_idx = header_rows.idxmax()
+    name_cols = name_hits.columns[name_hits.loc[header_idx]]
+
+    # Body runs until the first row with a "leavers" cell. Every body column
+    # is stripped once here and reused below, lowered or not.
+    stripped = df.iloc[header_idx + 1:].apply(lambda col: col.str.strip())
+    lowered = stripped.apply(lambda col: col.str.lower())
+    leaver_rows = (lowered == "leavers").any(axis=1)
+    stop = leaver_rows.idxmax() if leaver_rows.any() else len(df)
+    body = stripped.loc[:stop - 1]
+    body_lower = lowered.loc[:stop - 1]
+
+    # A taster is a Name cell that starts with a letter and is not a header
+    # token, with something in the date column to its right.
+    count = 0
+    for col in name_cols:
+        if col + 1 >= df.shape[1]:
+            continue
+        first = body[col].str[:1]
+        starts_alpha = (
+            ((first >= "A") & (first <= "Z")) | ((first >= "a") & (first <= "z"))
+        )
+        count += int((
+            starts_alpha
+            & ~body_lower[col].isin(HEADER_TOKENS)
+            & (body[col + 1] != "")
+        ).sum())
     return count
 
 
@@ -77,12 +101,23 @@ def main():
     print(f"\n📂 Scanning CSVs in:")
     print(f"   {root}\n")
 
-    for csv_file in sorted(root.rglob("*.csv")):
+    # os.walk reports files and directories from one scandir per folder,
+    # so filtering by suffix needs no extra stat per entry.
+    csv_files = sorted(
+        Path(dirpath) / name
+        for dirpath, _dirs, names in os.walk(root)
+        for name in names
+        if name.endswith(".csv")
+    )
+    if not csv_files:
+        print("No CSV files found.")
+
+    for csv_file in csv_files:
         try:
             n = count_csv(csv_file)
             print(f"📄 {csv_file.name:30} → {n}")
             total += n
-        except OSError as e:
+        except (OSError, pd.errors.ParserError) as e:
             print(f"⚠️ {csv_file.name:30} → skipped ({e})")
 
     print("\n==========================")
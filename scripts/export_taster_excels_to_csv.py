@@ -15,15 +15,23 @@ Output format:
 """
 
 import argparse
+import os
+import sys
 import pandas as pd
+from multiprocessing import Pool, cpu_count
 from pathlib import Path
 
 BASE_DIR = Path(__file__).resolve().parents[1]
+if str(BASE_DIR) not in sys.path:
+    sys.path.insert(0, str(BASE_DIR))
+
+from script_helpers import calamine_available
 
 MONTHS = [
     "January","February","March","April","May","June",
     "July","August","September","October","November","December"
 ]
+MONTHS_SET = frozenset(MONTHS)
 
 def normalise_programme(filename: str) -> str:
     f = filename.lower()
@@ -33,40 +41,50 @@ def normalise_programme(filename: str) -> str:
         return "honley"
     return "lockwood"
 
-def export_workbook(xlsx_path: Path, out_dir: Path):
+def export_workbook(xlsx_path: Path, out_dir: Path, engine: str = "calamine"):
     programme = normalise_programme(xlsx_path.name)
     print(f"\n📘 Reading workbook: {xlsx_path.name}")
     print(f"Programme detected: {programme}")
 
     try:
-        xls = pd.ExcelFile(xlsx_path)
+        xls = pd.ExcelFile(xlsx_path, engine=engine)
     except Exception as e:
         print(f"❌ Failed to open {xlsx_path.name}: {e}")
         return
 
-    for sheet in xls.sheet_names:
-        if sheet not in MONTHS:
-            continue
+    wanted = [sheet for sheet in xls.sheet_names if sheet in MONTHS_SET]
+    if not wanted:
+        return
 
+    # One parse call for every month sheet; if any sheet is unreadable,
+    # retry one by one so a single bad sheet doesn't sink the workbook.
+    try:
+        frames = xls.parse(wanted, header=None, dtype=str)  # preserve raw text
+    except Exception:
+        frames = {}
+        for sheet in wanted:
+            try:
+                frames[sheet] = xls.parse(sheet, header=None, dtype=str)
+            except Exception as e:
+                print(f"  ↳ Exporting sheet: {sheet}")
+                print(f"    ❌ Failed to read sheet {sheet}: {e}")
+
+    for sheet, df in frames.items():
         print(f"  ↳ Exporting sheet: {sheet}")
 
-        try:
-            df = pd.read_excel(
-                xlsx_path,
-                sheet_name=sheet,
-                header=None,
-                dtype=str  # preserve raw text
-            )
-        except Exception as e:
-            print(f"    ❌ Failed to read sheet {sheet}: {e}")
-            continue
-
         out_name = f"{programme}__{sheet}.csv"
         out_path = out_dir / out_name
 
         df.to_csv(out_path, index=False, header=False)
         print(f"    ✅ Wrote {out_path}")
 
+def export_programme_job(job):
+    # Workbooks for the same programme write the same <programme>__<Month>.csv
+    # names, so they stay together in one worker, in input order (last wins).
+    paths, out_dir, engine = job
+    for xlsx_path in paths:
+        export_workbook(xlsx_path, out_dir, engine)
+
 def main():
     parser = argparse.ArgumentParser()
     parser.add_argument("--input", required=True, help="Folder containing .xlsx taster sheets")
@@ -75,7 +93,15 @@ def main():
         default=str(BASE_DIR / "data" / "exports"),
         help="Output folder for CSV files",
     )
+    parser.add_argument(
+        "--engine",
+        choices=["calamine", "openpyxl"],
+        default=os.environ.get("TASTERIST_EXPORT_ENGINE", "calamine"),
+    )
     args = parser.parse_args()
+    if args.engine == "calamine" and not calamine_available():
+        print("⚠️ python-calamine not installed; falling back to openpyxl.")
+        args.engine = "openpyxl"
 
     in_dir = Path(args.input)
     out_dir = Path(args.output)
@@ -86,8 +112,17 @@ def main():
         print("❌ No .xlsx files found")
         return
 
+    by_programme = {}
     for xlsx in xlsx_files:
-        export_workbook(xlsx, out_dir)
+        by_programme.setdefault(normalise_programme(xlsx.name), []).append(xlsx)
+    jobs = [(paths, out_dir, args.engine) for paths in by_programme.values()]
+
+    if len(jobs) < 2:
+        for job in jobs:
+            export_programme_job(job)
+    else:
+        with Pool(processes=min(cpu_count(), len(jobs))) as pool:
+            pool.map(export_programme_job, jobs)
 
     print("\n🎉 CSV export complete")
 
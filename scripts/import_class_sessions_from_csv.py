@@ -12,15 +12,30 @@ Supports both legacy and current CSV column names:
 
 import argparse
 import csv
-import sqlite3
+import sys
+from itertools import islice
 from pathlib import Path
 
 import pandas as pd
 
 BASE_DIR = Path(__file__).resolve().parents[1]
+if str(BASE_DIR) not in sys.path:
+    sys.path.insert(0, str(BASE_DIR))
+
+from schema_version import SQLITE_SCHEMA_VERSION
+from script_helpers import open_conn
+
 DEFAULT_DB_PATH = BASE_DIR / "data" / "db" / "tasterist.db"
 DEFAULT_CSV_PATH = BASE_DIR / "data" / "archive" / "Events_from_19_Jan_2026_to_25_Jan_2026-2.csv"
 
+INSERT_SQL = """
+    INSERT OR IGNORE INTO class_sessions (
+        programme, location, session_date, day,
+        class_name, start_time, end_time, source_file
+    )
+    VALUES (?,?,?,?,?,?,?,?)
+"""
+
 
 def pick_column(columns, candidates):
     col_map = {c.strip().lower(): c for c in columns}
@@ -30,39 +45,40 @@ def pick_column(columns, candidates):
     return None
 
 
-def infer_programme(class_name, address):
-    text = f"{class_name} {address}".lower()
+HONLEY_PATTERN = r"honley"
+PRESCHOOL_PATTERN = r"mini roos|jumping joeys|kangaroo kids|preschool|pre-school"
+PROGRAMME_LOCATIONS = {
+    "honley": "Honley",
+    "preschool": "Preschool",
+    "lockwood": "Lockwood",
+}
 
-    if "honley" in text:
-        return "honley", "Honley"
 
-    if any(
-        token in text for token in (
-            "mini roos", "jumping joeys", "kangaroo kids",
-            "preschool", "pre-school"
-        )
-    ):
-        return "preschool", "Preschool"
+def infer_programmes(class_names, addresses):
+    # Honley wins over preschool keywords; anything else (including explicit
+    # "lockwood") falls through to Lockwood.
+    text = (class_names + " " + addresses).str.lower()
+    programmes = pd.Series("lockwood", index=text.index)
+    programmes[text.str.contains(PRESCHOOL_PATTERN, regex=True)] = "preschool"
+    programmes[text.str.contains(HONLEY_PATTERN, regex=True)] = "honley"
+    return programmes, programmes.map(PROGRAMME_LOCATIONS)
 
-    if "lockwood" in text:
-        return "lockwood", "Lockwood"
 
-    return "lockwood", "Lockwood"
+HEADER_GROUPS = (
+    frozenset(("name", "event name")),
+    frozenset(("date",)),
+    frozenset(("start", "start time")),
+    frozenset(("end", "end time")),
+)
+HEADER_SCAN_ROWS = 32
 
 
 def detect_header_row(csv_path):
     with open(csv_path, newline="", encoding="utf-8-sig") as f:
-        reader = csv.reader(f)
-        for idx, row in enumerate(reader):
-            lowered = {cell.strip().lower() for cell in row if cell and cell.strip()}
-            has_name = "name" in lowered or "event name" in lowered
-            has_date = "date" in lowered
-            has_start = "start" in lowered or "start time" in lowered
-            has_end = "end" in lowered or "end time" in lowered
-            if has_name and has_date and has_start and has_end:
+        for idx, row in enumerate(islice(csv.reader(f), HEADER_SCAN_ROWS)):
+            lowered = {cell.strip().lower() for cell in row if cell}
+            if all(not group.isdisjoint(lowered) for group in HEADER_GROUPS):
                 return idx
-            if idx > 30:
-                break
     return 0
 
 
@@ -87,21 +103,31 @@ def main():
 
     print(f"Reading CSV: {args.csv}")
     header_row = detect_header_row(args.csv)
-    df = pd.read_csv(args.csv, skiprows=header_row)
-    print(f"Loaded {len(df)} rows")
+    columns = pd.read_csv(args.csv, skiprows=header_row, nrows=0).columns
 
-    name_col = pick_column(df.columns, ["Name", "Event Name"])
-    date_col = pick_column(df.columns, ["date", "Date"])
-    start_col = pick_column(df.columns, ["Start", "Start Time"])
-    end_col = pick_column(df.columns, ["End", "End Time"])
-    addr_col = pick_column(df.columns, ["Address", "Location"])
+    name_col = pick_column(columns, ["Name", "Event Name"])
+    date_col = pick_column(columns, ["date", "Date"])
+    start_col = pick_column(columns, ["Start", "Start Time"])
+    end_col = pick_column(columns, ["End", "End Time"])
+    addr_col = pick_column(columns, ["Address", "Location"])
 
     required = [("name", name_col), ("date", date_col), ("start", start_col), ("end", end_col)]
     missing = [label for label, col in required if not col]
     if missing:
         raise SystemExit(f"Missing required CSV columns: {', '.join(missing)}")
 
-    conn = sqlite3.connect(args.db)
+    # Bookings exports carry many unused columns; only load the ones we import,
+    # as plain strings. Blanks and pandas' default NA tokens ("NA", "N/A",
+    # "nan", ...) all become "" and count as missing below.
+    df = pd.read_csv(
+        args.csv,
+        skiprows=header_row,
+        usecols=[c for c in (name_col, date_col, start_col, end_col, addr_col) if c],
+        dtype=str,
+    ).fillna("")
+    print(f"Loaded {len(df)} rows")
+
+    conn = open_conn(args.db, bulk_load=True)
     cur = conn.cursor()
 
     cur.execute("""
@@ -117,11 +143,14 @@ def main():
             source_file TEXT DEFAULT ''
         )
     """)
-    class_cols = {row[1] for row in cur.execute("PRAGMA table_info(class_sessions)")}
-    if "session_date" not in class_cols:
-        cur.execute(
-            "ALTER TABLE class_sessions ADD COLUMN session_date TEXT NOT NULL DEFAULT ''"
-        )
+    # The app stamps PRAGMA user_version once its column back-fills have run,
+    # which include class_sessions.session_date.
+    if cur.execute("PRAGMA user_version").fetchone()[0] < SQLITE_SCHEMA_VERSION:
+        class_cols = {row[1] for row in cur.execute("PRAGMA table_info(class_sessions)")}
+        if "session_date" not in class_cols:
+            cur.execute(
+                "ALTER TABLE class_sessions ADD COLUMN session_date TEXT NOT NULL DEFAULT ''"
+            )
 
     cur.execute("DROP INDEX IF EXISTS uniq_class_session")
     cur.execute("""
@@ -136,47 +165,43 @@ def main():
         print("Clearing existing class_sessions...")
         cur.execute("DELETE FROM class_sessions")
 
-    inserted = 0
-    for _, row in df.iterrows():
-        class_name = str(row.get(name_col, "")).strip()
-        if not class_name or class_name.lower() == "nan":
-            continue
-
-        date_raw = str(row.get(date_col, "")).strip()
-        start_time = str(row.get(start_col, "")).strip()
-        end_time = str(row.get(end_col, "")).strip()
-        address = str(row.get(addr_col, "")).strip() if addr_col else ""
-
-        if not date_raw or not start_time:
-            continue
-
-        parsed_date = pd.to_datetime(date_raw, errors="coerce")
-        if pd.isna(parsed_date):
-            continue
-
-        day_name = parsed_date.strftime("%A")
-        session_date = parsed_date.strftime("%Y-%m-%d")
-        programme, location = infer_programme(class_name, address)
+    def text_column(col):
+        if not col:
+            return pd.Series("", index=df.index)
+        return df[col].str.strip()
+
+    class_names = text_column(name_col)
+    start_times = text_column(start_col)
+    end_times = text_column(end_col)
+    addresses = text_column(addr_col)
+    # format="mixed" parses each value on its own, like the old per-row call,
+    # instead of locking onto the first row's format.
+    parsed_dates = pd.to_datetime(text_column(date_col), errors="coerce", format="mixed")
+
+    keep = (
+        (class_names != "")
+        & (start_times != "")
+        & parsed_dates.notna()
+    )
+    kept_dates = parsed_dates[keep]
+    programmes, locations = infer_programmes(class_names[keep], addresses[keep])
+    rows = [
+        (programme, location, session_date, day_name,
+         class_name, start_time, end_time, args.csv)
+        for programme, location, session_date, day_name, class_name, start_time, end_time in zip(
+            programmes,
+            locations,
+            kept_dates.dt.strftime("%Y-%m-%d"),
+            kept_dates.dt.day_name(),
+            class_names[keep],
+            start_times[keep],
+            end_times[keep],
+        )
+    ]
 
-        cur.execute("""
-            INSERT OR IGNORE INTO class_sessions (
-                programme, location, session_date, day,
-                class_name, start_time, end_time, source_file
-            )
-            VALUES (?,?,?,?,?,?,?,?)
-        """, (
-            programme,
-            location,
-            session_date,
-            day_name,
-            class_name,
-            start_time,
-            end_time if end_time and end_time.lower() != "nan" else "",
-            args.csv,
-        ))
-
-        if cur.rowcount == 1:
-            inserted += 1
+    changes_before = conn.total_changes
+    cur.executemany(INSERT_SQL, rows)
+    inserted = conn.total_changes - changes_before
 
     conn.commit()
 
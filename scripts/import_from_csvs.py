@@ -13,8 +13,15 @@ import sqlite3
 import argparse
 from pathlib import Path
 import csv
+import sys
+from multiprocessing import Pool, cpu_count
 
 BASE_DIR = Path(__file__).resolve().parents[1]
+if str(BASE_DIR) not in sys.path:
+    sys.path.insert(0, str(BASE_DIR))
+
+from script_helpers import open_conn
+
 DEFAULT_DB_PATH = BASE_DIR / "data" / "db" / "tasterist.db"
 
 
@@ -34,6 +41,8 @@ CSV_COLUMNS = [
     "notes",
 ]
 
+REQUIRED_COLUMNS = frozenset(CSV_COLUMNS)
+
 DB_COLUMNS = [
     "child",
     "programme",
@@ -57,71 +66,113 @@ def infer_location(programme: str) -> str:
     return "Lockwood"
 
 
+TRUTHY_VALUES = frozenset(("yes", "y", "1", "true", "paid", "done", "✓"))
+
+
 def truthy(v):
-    if v is None:
+    # csv.reader cells are already strings: skip str() and bail early on blanks.
+    if not v:
         return 0
-    s = str(v).strip().lower()
-    return 1 if s in ("yes", "y", "1", "true", "paid", "done", "✓") else 0
+    s = v if isinstance(v, str) else str(v)
+    return 1 if s.strip().lower() in TRUTHY_VALUES else 0
 
 
 # --------------------------------------------------
 # IMPORTER
 # --------------------------------------------------
 
-def import_csv(path: Path, conn: sqlite3.Connection) -> int:
-    inserted = 0
-    cur = conn.cursor()
+INSERT_SQL = """
+    INSERT OR IGNORE INTO tasters (
+        child,
+        programme,
+        location,
+        session,
+        taster_date,
+        attended,
+        bg,
+        badge,
+        notes
+    )
+    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+"""
 
+BATCH_SIZE = 5000
+MAX_PARSE_WORKERS = 4
+
+
+def parse_csv(path: Path) -> list:
+    # Pure parsing, no DB access, so it can run in a worker process.
     with open(path, newline="", encoding="utf-8") as f:
-        reader = csv.DictReader(f)
+        reader = csv.reader(f)
+        header = next(reader, [])
+        # Resolve columns to indexes once; plain lists are cheaper per row than dicts.
+        col = {name: idx for idx, name in enumerate(header)}
 
-        missing = set(CSV_COLUMNS) - set(reader.fieldnames or [])
+        missing = REQUIRED_COLUMNS.difference(col)
         if missing:
             raise RuntimeError(
                 f"{path.name} missing columns: {', '.join(missing)}"
             )
 
+        width = len(header)
+        i_child, i_programme, i_session, i_date = (
+            col["child"], col["programme"], col["session"], col["taster_date"]
+        )
+        i_attended, i_bg, i_badge, i_notes = (
+            col["attended"], col["bg"], col["badge"], col["notes"]
+        )
+
+        rows = []
         for row in reader:
-            child = row["child"].strip()
-            programme = row["programme"].strip()
-            session = row["session"].strip()
-            taster_date = row["taster_date"].strip()
+            if len(row) < width:
+                row += [""] * (width - len(row))
+            child = row[i_child].strip()
+            programme = row[i_programme].strip()
+            session = row[i_session].strip()
+            taster_date = row[i_date].strip()
 
             if not child or not programme or not taster_date:
                 continue
 
-            cur.execute(
-                """
-                INSERT OR IGNORE INTO tasters (
-                    child,
-                    programme,
-                    location,
-                    session,
-                    taster_date,
-                    attended,
-                    bg,
-                    badge,
-                    notes
-                )
-                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
-                """,
-                (
-                    child,
-                    programme,
-                    infer_location(programme),
-                    session,
-                    taster_date,
-                    truthy(row.get("attended")),
-                    truthy(row.get("bg")),
-                    truthy(row.get("badge")),
-                    row.get("notes", "").strip(),
-                ),
-            )
+            rows.append((
+                child,
+                programme,
+                infer_location(programme),
+                session,
+                taster_date,
+                truthy(row[i_attended]),
+                truthy(row[i_bg]),
+                truthy(row[i_badge]),
+                row[i_notes].strip(),
+            ))
+
+    return rows
+
+
+def insert_rows(conn: sqlite3.Connection, rows: list) -> int:
+    # total_changes only counts rows INSERT OR IGNORE actually wrote,
+    # so the delta is the inserted count across all batches.
+    changes_before = conn.total_changes
+    cur = conn.cursor()
+    with conn:
+        for start in range(0, len(rows), BATCH_SIZE):
+            cur.executemany(INSERT_SQL, rows[start:start + BATCH_SIZE])
+    return conn.total_changes - changes_before
+
+
+def import_csv(path: Path, conn: sqlite3.Connection) -> int:
+    return insert_rows(conn, parse_csv(path))
 
-            if cur.rowcount == 1:
-                inserted += 1
 
-    return inserted
+def parsed_csvs(files: list):
+    # Parse files across worker processes while this process does the writes;
+    # imap keeps file order so output and insert order match a serial run.
+    if len(files) < 2:
+        for path in files:
+            yield path, parse_csv(path)
+        return
+    with Pool(processes=min(MAX_PARSE_WORKERS, cpu_count(), len(files))) as pool:
+        yield from zip(files, pool.imap(parse_csv, files))
 
 
 # --------------------------------------------------
@@ -139,7 +190,7 @@ def main():
     if not root.exists():
         raise SystemExit(f"❌ Folder not found: {root}")
 
-    conn = sqlite3.connect(args.db)
+    conn = open_conn(args.db, bulk_load=True)
 
     if args.apply:
         print("\n🔥 Clearing tasters table")
@@ -151,9 +202,9 @@ def main():
     print(f"\n📂 Importing CSVs from:")
     print(f"   {root}\n")
 
-    for csv_file in sorted(root.rglob("*.csv")):
+    for csv_file, rows in parsed_csvs(sorted(root.rglob("*.csv"))):
         print(f"📄 {csv_file.name}")
-        n = import_csv(csv_file, conn)
+        n = insert_rows(conn, rows)
         print(f"   ✔ Inserted: {n}")
         total += n
 
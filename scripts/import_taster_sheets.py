@@ -11,61 +11,123 @@ PASS 3: insert leavers (month-only)
 • Idempotent (safe to re-run)
 """
 
+import os
 import sqlite3
 import argparse
 from pathlib import Path
-from datetime import datetime
+from collections import namedtuple
+from datetime import date, datetime
+from functools import lru_cache
 import re
+import sys
 import zipfile
+from multiprocessing import Pool, cpu_count
 from openpyxl import load_workbook
 
 BASE_DIR = Path(__file__).resolve().parents[1]
+if str(BASE_DIR) not in sys.path:
+    sys.path.insert(0, str(BASE_DIR))
+
+from script_helpers import calamine_available, open_conn
+
 DEFAULT_DB_PATH = BASE_DIR / "data" / "db" / "tasterist.db"
+ZIP_MAGIC = b"PK\x03\x04"
+MAX_PARSE_WORKERS = 4
 
 # --------------------------------------------------
 # CONFIG
 # --------------------------------------------------
 
 DAYS = ["Monday","Tuesday","Wednesday","Thursday","Friday","Saturday","Sunday"]
+DAY_SET = frozenset(DAYS)
 
 MONTHS = [
     "January","February","March","April","May","June",
     "July","August","September","October","November","December"
 ]
 
+# Compiled once; these run for every cell of every sheet.
+WORKBOOK_KEY_RE = re.compile(r"[^a-z0-9]+")
+YEAR_RE = re.compile(r"(20\d{2})")
+YEAR_PART_RE = re.compile(r"20\d{2}")
+CLOCK_TIME_RE = re.compile(r"^(\d{1,2}):(\d{2})(?::\d{2})?\s*([ap]m)?$", re.IGNORECASE)
+TIME_PREFIX_RE = re.compile(r"\d{1,2}:\d{2}")
+WS_RE = re.compile(r"\s+")
+NAME_SEPARATOR_RE = re.compile(r"([\-'])")
+ORDINAL_RE = re.compile(r"(st|nd|rd|th)")
+OF_RE = re.compile(r"\bof\b")
+
+TASTER_INSERT_SQL = """
+    INSERT OR IGNORE INTO tasters (
+        child, programme, location, session, class_name, taster_date,
+        attended, club_fees, bg, badge, notes
+    )
+    VALUES {values}
+"""
+TASTER_ROW_PLACEHOLDER = "(?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)"
+
+LEAVER_INSERT_SQL = """
+    INSERT OR IGNORE INTO leavers
+    (child, programme, leave_month, leave_date, session, class_name, source)
+    VALUES {values}
+"""
+LEAVER_ROW_PLACEHOLDER = "(?, ?, ?, ?, ?, ?, ?)"
+
+# Bound-variable cap of SQLite builds before 3.32; multi-row inserts are
+# chunked to stay under it wherever the importer runs.
+SQLITE_MAX_PARAMS = 999
+
 # --------------------------------------------------
 # HELPERS
 # --------------------------------------------------
 
-def normalise_programme(fname):
+@lru_cache(maxsize=None)
+def classify_filename(fname):
+    # One pass over the lower-cased name: (supported, programme, year).
     f = fname.lower()
+    supported = "taster" in f and "leaver" in f
     # Support both "preschool" and "pre-school" filename variants.
     if "preschool" in f or "pre-school" in f:
-        return "preschool"
-    if "honley" in f:
-        return "honley"
-    return "lockwood"
+        programme = "preschool"
+    elif "honley" in f:
+        programme = "honley"
+    else:
+        programme = "lockwood"
+    m = YEAR_RE.search(fname)
+    year = int(m.group(1)) if m else datetime.now().year
+    return supported, programme, year
 
 
-def is_supported_workbook(fname):
-    f = fname.lower()
-    return "taster" in f and "leaver" in f
+def workbook_key(name):
+    return WORKBOOK_KEY_RE.sub("", Path(name).name.lower())
 
 
-def workbook_key(name):
-    return re.sub(r"[^a-z0-9]+", "", Path(name).name.lower())
+def looks_like_xlsx(path):
+    # Reading the 4-byte local header signature is much cheaper than
+    # is_zipfile's end-of-archive scan; only files that fail it get the full
+    # check. Unreadable files (e.g. cloud placeholders) count as invalid.
+    try:
+        with open(path, "rb") as fh:
+            if fh.read(4) == ZIP_MAGIC:
+                return True
+    except OSError:
+        return False
+    return zipfile.is_zipfile(path)
 
 
 def detect_workbook_year(path):
-    m = re.search(r"(20\d{2})", path.name)
+    m = YEAR_RE.search(path.name)
     if m:
         return int(m.group(1))
     for part in reversed(path.parts):
-        if re.fullmatch(r"20\d{2}", part):
+        if YEAR_PART_RE.fullmatch(part):
             return int(part)
     return None
 
 
+# Sheet cell values repeat heavily (same dates/times down a column), so the
+# pure parsers are memoised. typed=True keeps True/1/1.0 cells distinct.
+@lru_cache(maxsize=4096, typed=True)
 def normalise_time(v):
     if v is None:
         return None
@@ -74,7 +136,7 @@ def normalise_time(v):
     if hasattr(v, "hour"):  # datetime.time
         return f"{v.hour:02d}:{v.minute:02d}"
     s = str(v).strip()
-    m = re.match(r"^(\d{1,2}):(\d{2})(?::\d{2})?\s*([ap]m)?$", s, flags=re.IGNORECASE)
+    m = CLOCK_TIME_RE.match(s)
     if not m:
         return s
     hour = int(m.group(1))
@@ -96,6 +158,8 @@ def normalise_time(v):
 def normalise_cell_text(v):
     if v is None:
         return ""
+    if isinstance(v, str):
+        return v.strip()
     if isinstance(v, datetime):
         return v.strftime("%Y-%m-%d %H:%M")
     if hasattr(v, "hour"):  # datetime.time
@@ -103,13 +167,14 @@ def normalise_cell_text(v):
     return str(v).strip()
 
 
+@lru_cache(maxsize=8192, typed=True)
 def normalise_child_name(value):
-    text = re.sub(r"\s+", " ", str(value or "").strip())
+    text = WS_RE.sub(" ", str(value or "").strip())
     if not text:
         return ""
     words = []
     for word in text.split(" "):
-        parts = re.split(r"([\-'])", word)
+        parts = NAME_SEPARATOR_RE.split(word)
         rebuilt = []
         for part in parts:
             if part in {"-", "'"}:
@@ -125,7 +190,11 @@ def truthy(v):
         return 0
     if isinstance(v, bool):
         return 1 if v else 0
-    s = str(v).strip().lower()
+    # A number's text never contains "no"/"yes", so any number (even 0) has
+    # always counted as ticked; skip formatting it.
+    if isinstance(v, (int, float)):
+        return 1
+    s = (v if isinstance(v, str) else str(v)).strip().lower()
     if not s:
         return 0
     if "no" in s:
@@ -134,13 +203,10 @@ def truthy(v):
         return 1
     return 1
 
-def extract_year(fname):
-    m = re.search(r"(20\d{2})", fname)
-    return int(m.group(1)) if m else datetime.now().year
-
 def looks_like_time(v):
-    return isinstance(v, str) and re.match(r"\d{1,2}:\d{2}", v.strip())
+    return isinstance(v, str) and bool(TIME_PREFIX_RE.match(v.strip()))
 
+@lru_cache(maxsize=4096, typed=True)
 def parse_date(val, month, year):
     if val is None:
         return None
@@ -152,9 +218,31 @@ def parse_date(val, month, year):
     if not s:
         return None
 
-    s = re.sub(r"(st|nd|rd|th)", "", s)
-    s = re.sub(r"\bof\b", " ", s)
-    s = re.sub(r"\s+", " ", s).strip()
+    s = ORDINAL_RE.sub("", s)
+    s = OF_RE.sub(" ", s)
+    s = WS_RE.sub(" ", s).strip()
+
+    # Fast paths for the common ISO and dd/mm/yyyy spellings; anything they
+    # cannot settle falls through to the strptime cascade below.
+    if len(s) == 10 and s[4] == "-" and s[7] == "-":
+        if s[:4].isdigit() and s[5:7].isdigit() and s[8:].isdigit():
+            try:
+                return date(int(s[:4]), int(s[5:7]), int(s[8:])).isoformat()
+            except ValueError:
+                pass
+    elif s.count("/") == 2:
+        d, m, y = s.split("/")
+        if (
+            d.isdigit() and m.isdigit() and y.isdigit()
+            and len(d) <= 2 and len(m) <= 2 and len(y) == 4
+        ):
+            try:
+                # Validate as written, then pin to the sheet year like the
+                # "%d/%m/%Y" branch does.
+                date(int(y), int(m), int(d))
+                return date(year, int(m), int(d)).isoformat()
+            except ValueError:
+                pass
 
     for fmt in ("%Y-%m-%d %H:%M:%S", "%Y-%m-%d"):
         try:
@@ -186,54 +274,142 @@ def parse_date(val, month, year):
 # IMPORT ONE WORKBOOK
 # --------------------------------------------------
 
-def find_name_columns(ws, max_scan_rows=25):
-    for r in range(1, min(max_scan_rows, ws.max_row) + 1):
-        cols = []
-        for c in range(1, ws.max_column + 1):
-            v = ws.cell(r, c).value
-            if isinstance(v, str) and v.strip().lower() == "name":
-                cols.append(c)
-        if cols:
-            return r, cols
-    return None, []
-
-
-def find_section_rows(ws, marker):
-    hits = []
-    for r in range(1, ws.max_row + 1):
-        row_has_marker = False
-        for c in range(1, ws.max_column + 1):
-            v = ws.cell(r, c).value
-            if isinstance(v, str) and v.strip().lower() == marker.lower():
-                row_has_marker = True
-                break
-        if row_has_marker:
-            hits.append(r)
-    return hits
-
-
-def find_leaver_header_row(ws, start_row):
-    scan_to = min(start_row + 15, ws.max_row)
-    for r in range(start_row, scan_to + 1):
-        name_cols = []
-        has_leave_col = False
-        for c in range(1, ws.max_column + 1):
-            v = ws.cell(r, c).value
-            if not isinstance(v, str):
-                continue
-            s = v.strip().lower()
-            if s == "name":
-                name_cols.append(c)
-            if "leave" in s:
-                has_leave_col = True
-        if name_cols and has_leave_col:
-            return r, name_cols
-    return None, []
-
-
-def import_excel(path, conn):
-    programme = normalise_programme(path.name)
-    year = extract_year(path.name)
+def insert_rows(cur, sql, placeholder, rows):
+    # Multi-row VALUES per chunk: one statement step per chunk instead of one
+    # per row. OR IGNORE still applies row by row, in order, so rowcount is
+    # the number of rows actually inserted.
+    rows = list(rows)
+    if not rows:
+        return 0
+    chunk_rows = max(1, SQLITE_MAX_PARAMS // len(rows[0]))
+    inserted = 0
+    for start in range(0, len(rows), chunk_rows):
+        chunk = rows[start:start + chunk_rows]
+        cur.execute(
+            sql.format(values=", ".join([placeholder] * len(chunk))),
+            [value for row in chunk for value in row],
+        )
+        inserted += cur.rowcount
+    return inserted
+
+
+def pad_rows(rows):
+    width = max((len(row) for row in rows), default=0)
+    for row in rows:
+        row.extend([None] * (width - len(row)))
+    return rows
+
+
+def load_sheet_rows_openpyxl(path):
+    # Read-only mode streams each sheet once; rows are kept as plain value lists
+    # so the passes below never touch openpyxl Cell objects.
+    wb = load_workbook(path, data_only=True, read_only=True)
+    try:
+        return [
+            pad_rows([list(row) for row in ws.iter_rows(values_only=True)])
+            for ws in wb.worksheets
+        ]
+    finally:
+        wb.close()
+
+
+def load_sheet_rows_calamine(path):
+    from python_calamine import CalamineWorkbook
+
+    wb = CalamineWorkbook.from_path(str(path))
+    sheets = []
+    for idx in range(len(wb.sheet_names)):
+        # Keep leading blank rows/columns so row/column numbers match openpyxl.
+        data = wb.get_sheet_by_index(idx).to_python(skip_empty_area=False)
+        # Calamine reports empty cells as "", openpyxl as None.
+        sheets.append(pad_rows([[None if v == "" else v for v in row] for row in data]))
+    return sheets
+
+
+SHEET_LOADERS = {
+    "openpyxl": load_sheet_rows_openpyxl,
+    "calamine": load_sheet_rows_calamine,
+}
+
+
+def load_workbook_job(job):
+    # Worker entry point: errors come back as text so one bad file never
+    # poisons the pool and the main loop can report it like before.
+    path, engine = job
+    try:
+        return SHEET_LOADERS[engine](path), None
+    except Exception as exc:
+        return None, f"{exc.__class__.__name__}: {exc}"
+
+
+def loaded_workbooks(paths, engine):
+    # Parsing is the slow, CPU-bound part and needs no database, so it runs in
+    # worker processes. Row transforms and inserts stay in this process in
+    # file order: leavers match against tasters from earlier workbooks.
+    jobs = [(path, engine) for path in paths]
+    if len(jobs) < 2:
+        yield from map(load_workbook_job, jobs)
+        return
+    with Pool(processes=min(MAX_PARSE_WORKERS, cpu_count(), len(jobs))) as pool:
+        yield from pool.imap(load_workbook_job, jobs)
+
+
+def cell_value(rows, r, c):
+    # 1-based like ws.cell(r, c); out-of-range reads behave like empty cells.
+    if r < 1 or c < 1 or r > len(rows):
+        return None
+    row = rows[r - 1]
+    return row[c - 1] if c <= len(row) else None
+
+
+SheetLayout = namedtuple("SheetLayout", (
+    "name_header_row", "name_cols",
+    "leaver_markers", "leaver_header_row", "leaver_name_cols",
+))
+
+
+def scan_sheet(rows, max_scan_rows=25):
+    # One pass finds the taster Name header (within the first rows), every
+    # LEAVERS marker, and the leaver header within 15 rows of the first marker.
+    name_header_row, name_cols = None, []
+    leaver_markers = []
+    leaver_header_row, leaver_name_cols = None, []
+    for r, row in enumerate(rows, start=1):
+        texts = [(c, v.strip().lower()) for c, v in enumerate(row, start=1) if isinstance(v, str)]
+        if not texts:
+            continue
+        row_name_cols = [c for c, t in texts if t == "name"]
+        if name_header_row is None and row_name_cols and r <= max_scan_rows:
+            name_header_row, name_cols = r, row_name_cols
+        if any(t == "leavers" for _, t in texts):
+            leaver_markers.append(r)
+        if (
+            leaver_markers and leaver_header_row is None
+            and r <= leaver_markers[0] + 15
+            and row_name_cols and any("leave" in t for _, t in texts)
+        ):
+            leaver_header_row, leaver_name_cols = r, row_name_cols
+    return SheetLayout(name_header_row, name_cols, leaver_markers, leaver_header_row, leaver_name_cols)
+
+
+def load_taster_index(cur, programme):
+    # child (lower-cased) -> [(taster_date, session, class_name)], newest first.
+    # Built once per leaver section instead of scanning tasters per leaver.
+    index = {}
+    for child, session, class_name, taster_date in cur.execute(
+        "SELECT child, session, class_name, taster_date FROM tasters WHERE programme=?",
+        (programme,),
+    ):
+        index.setdefault((child or "").lower(), []).append(
+            (taster_date or "", session, class_name)
+        )
+    for matches in index.values():
+        matches.sort(key=lambda m: m[0], reverse=True)
+    return index
+
+
+def import_excel(path, conn, engine="openpyxl", sheets=None):
+    _, programme, year = classify_filename(path.name)
     if programme == "honley":
         location = "Honley"
     elif programme == "preschool":
@@ -241,9 +417,23 @@ def import_excel(path, conn):
     else:
         location = "Lockwood"
 
-    wb = load_workbook(path, data_only=True)
+    if sheets is None:
+        sheets = SHEET_LOADERS[engine](path)
     cur = conn.cursor()
 
+    # class_sessions is small; load it once instead of querying per taster row.
+    # Ordered by class_name so setdefault keeps the first name per slot, as the
+    # old ORDER BY class_name LIMIT 1 lookups did.
+    sessions_by_date = {}
+    sessions_by_day = {}
+    for prog, session_date, day, hhmm, class_name in cur.execute("""
+        SELECT programme, session_date, day, substr(start_time, 1, 5), class_name
+        FROM class_sessions
+        ORDER BY class_name
+    """):
+        sessions_by_date.setdefault((prog, session_date, hhmm), class_name or "")
+        sessions_by_day.setdefault((prog, day, hhmm), class_name or "")
+
     def time_candidates(start_time):
         if not start_time or ":" not in start_time:
             return []
@@ -263,15 +453,9 @@ def import_excel(path, conn):
             return "", "", False
 
         for candidate in time_candidates(start_time):
-            row = cur.execute("""
-                SELECT class_name
-                FROM class_sessions
-                WHERE programme=? AND session_date=? AND substr(start_time, 1, 5)=?
-                ORDER BY class_name
-                LIMIT 1
-            """, (programme_key, iso_date, candidate)).fetchone()
-            if row:
-                return row[0] or "", candidate, True
+            key = (programme_key, iso_date, candidate)
+            if key in sessions_by_date:
+                return sessions_by_date[key], candidate, True
 
         weekday = day_name
         if not weekday:
@@ -281,52 +465,52 @@ def import_excel(path, conn):
                 weekday = ""
 
         for candidate in time_candidates(start_time):
-            row = cur.execute("""
-                SELECT class_name
-                FROM class_sessions
-                WHERE programme=? AND day=? AND substr(start_time, 1, 5)=?
-                ORDER BY class_name
-                LIMIT 1
-            """, (programme_key, weekday, candidate)).fetchone()
-            if row:
-                return row[0] or "", candidate, True
+            key = (programme_key, weekday, candidate)
+            if key in sessions_by_day:
+                return sessions_by_day[key], candidate, True
         return "", start_time, False
 
     tasters_inserted = 0
     leavers_inserted = 0
+    # (lower-cased name, leave_month) -> row; the first sighting in the workbook
+    # wins, as it would under uniq_leaver with INSERT OR IGNORE.
+    leaver_rows = {}
 
     print(f"\n📘 FILE: {path.name} → {programme} {year}")
 
-    for sheet_idx, ws in enumerate(wb.worksheets):
+    for sheet_idx, rows in enumerate(sheets):
         month = MONTHS[sheet_idx]
         print(f"  • {month}")
+        max_row = len(rows)
+        max_col = len(rows[0]) if rows else 0
 
-        name_header_row, name_cols = find_name_columns(ws)
+        layout = scan_sheet(rows)
+        name_header_row, name_cols = layout.name_header_row, layout.name_cols
         if not name_cols:
             print("   ⚠️ No Name column found — skipping sheet")
             continue
 
-        leaver_markers = find_section_rows(ws, "LEAVERS")
-        taster_end_row = min(leaver_markers) - 1 if leaver_markers else ws.max_row
+        leaver_markers = layout.leaver_markers
+        taster_end_row = min(leaver_markers) - 1 if leaver_markers else max_row
 
         sheet_default_date = datetime.strptime(
             f"1 {month} {year}", "%d %B %Y"
         ).date().isoformat()
 
-        def header_text(col_idx):
-            if col_idx < 1 or col_idx > ws.max_column:
-                return ""
-            v = ws.cell(name_header_row, col_idx).value
-            return str(v).strip().lower() if v is not None else ""
+        # Header cells normalised once; index i holds column i + 1.
+        header_texts = [
+            str(v).strip().lower() if v is not None else ""
+            for v in rows[name_header_row - 1]
+        ]
 
         def find_col(name_col, fallback_offset, matcher):
-            fallback = name_col + fallback_offset
-            for c in range(name_col + 1, min(name_col + 11, ws.max_column + 1)):
-                if matcher(header_text(c)):
+            for c, text in enumerate(header_texts[name_col:name_col + 10], start=name_col + 1):
+                if matcher(text):
                     return c
-            return fallback
+            return name_col + fallback_offset
 
-        column_map = {}
+        # One flat tuple per name column, unpacked directly in the row loop.
+        column_specs = []
         for col in name_cols:
             day_col = col - 1
             date_col = find_col(
@@ -353,15 +537,18 @@ def import_excel(path, conn):
                 col, 6,
                 lambda t: ("note" in t) or ("medical" in t)
             )
-            column_map[col] = {
-                "day_col": day_col,
-                "date_col": date_col,
-                "attended_col": attended_col,
-                "club_fees_col": club_fees_col,
-                "bg_col": bg_col,
-                "badge_col": badge_col,
-                "notes_col": notes_col,
-            }
+            column_specs.append((
+                col, day_col, date_col, attended_col,
+                club_fees_col, bg_col, badge_col, notes_col,
+            ))
+
+        # Pad once so every mapped column indexes the row lists directly.
+        needed_col = max(max(spec) for spec in column_specs)
+        if needed_col > max_col:
+            for row in rows:
+                row.extend([None] * (needed_col - len(row)))
+
+        taster_rows = []
 
         # Per name-column state lets each day block carry its own day/time/date.
         block_state = {
@@ -370,21 +557,16 @@ def import_excel(path, conn):
         }
 
         for r in range(name_header_row + 1, taster_end_row + 1):
-            for col in name_cols:
-                cols = column_map[col]
-                day_col = cols["day_col"]
-                date_col = cols["date_col"]
-                attended_col = cols["attended_col"]
-                club_fees_col = cols["club_fees_col"]
-                bg_col = cols["bg_col"]
-                badge_col = cols["badge_col"]
-                notes_col = cols["notes_col"]
-
+            row = rows[r - 1]
+            for (
+                col, day_col, date_col, attended_col,
+                club_fees_col, bg_col, badge_col, notes_col,
+            ) in column_specs:
                 if day_col >= 1:
-                    day_or_time = ws.cell(r, day_col).value
+                    day_or_time = row[day_col - 1]
                     if isinstance(day_or_time, str):
                         stripped = day_or_time.strip()
-                        if stripped in DAYS:
+                        if stripped in DAY_SET:
                             block_state[col]["day"] = stripped
                             block_state[col]["time"] = None
                         elif looks_like_time(stripped):
@@ -392,11 +574,14 @@ def import_excel(path, conn):
                     elif hasattr(day_or_time, "hour"):
                         block_state[col]["time"] = normalise_time(day_or_time)
 
-                parsed = parse_date(ws.cell(r, date_col).value, month, year)
+                # Day/time/date state must advance on nameless rows too, so
+                # only the empty-cell case skips work here.
+                date_val = row[date_col - 1]
+                parsed = parse_date(date_val, month, year) if date_val is not None else None
                 if parsed:
                     block_state[col]["date"] = parsed
 
-                name_val = ws.cell(r, col).value
+                name_val = row[col - 1]
                 if not isinstance(name_val, str):
                     continue
 
@@ -431,41 +616,57 @@ def import_excel(path, conn):
                     )
                     continue
 
-                note_val = ws.cell(r, notes_col).value if notes_col <= ws.max_column else ""
+                note_val = row[notes_col - 1]
 
-                cur.execute("""
-                    INSERT OR IGNORE INTO tasters (
-                        child, programme, location, session, class_name, taster_date,
-                        attended, club_fees, bg, badge, notes
-                    )
-                    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-                """, (
+                taster_rows.append((
                     name,
                     programme,
                     location,
                     session,
                     class_name,
                     effective_date,
-                    truthy(ws.cell(r, attended_col).value) if attended_col <= ws.max_column else 0,
-                    truthy(ws.cell(r, club_fees_col).value) if club_fees_col <= ws.max_column else 0,
-                    truthy(ws.cell(r, bg_col).value) if bg_col <= ws.max_column else 0,
-                    truthy(ws.cell(r, badge_col).value) if badge_col <= ws.max_column else 0,
+                    truthy(row[attended_col - 1]),
+                    truthy(row[club_fees_col - 1]),
+                    truthy(row[bg_col - 1]),
+                    truthy(row[badge_col - 1]),
                     normalise_cell_text(note_val),
                 ))
 
-                if cur.rowcount == 1:
-                    tasters_inserted += 1
+        # Flushed per sheet: the leaver pass below looks these tasters up.
+        if taster_rows:
+            tasters_inserted += insert_rows(
+                cur, TASTER_INSERT_SQL, TASTER_ROW_PLACEHOLDER, taster_rows
+            )
 
         # -------- LEAVERS (structured section only) --------
         if leaver_markers:
-            leaver_header_row, leaver_name_cols = find_leaver_header_row(ws, min(leaver_markers))
+            leaver_header_row, leaver_name_cols = layout.leaver_header_row, layout.leaver_name_cols
             if leaver_header_row and leaver_name_cols:
-                seen_leavers = set()
                 default_leave_month = f"{year}-{sheet_idx+1:02d}"
+                taster_index = load_taster_index(cur, programme)
+
+                # Most recent day/time label seen in each label column (the one
+                # left of a name column), as (row, value). Tracked while walking
+                # down so a leaver looks back up its block in O(1).
+                label_cols = {max(1, col - 1) for col in leaver_name_cols}
+                last_day = {}
+                last_time = {}
+
+                for r in range(leaver_header_row + 1, max_row + 1):
+                    for label_col in label_cols:
+                        probe_val = cell_value(rows, r, label_col)
+                        if probe_val is None:
+                            continue
+                        probe_text = str(probe_val).strip()
+                        if probe_text in DAY_SET:
+                            last_day[label_col] = (r, probe_text)
+                        if ":" in probe_text:
+                            maybe_time = normalise_time(probe_text)
+                            if maybe_time and ":" in maybe_time:
+                                last_time[label_col] = (r, maybe_time)
 
-                for r in range(leaver_header_row + 1, ws.max_row + 1):
                     for col in leaver_name_cols:
-                        name_val = ws.cell(r, col).value
+                        name_val = cell_value(rows, r, col)
                         if not isinstance(name_val, str):
                             continue
 
@@ -473,68 +674,54 @@ def import_excel(path, conn):
                         if not name or name.lower() == "name" or name.upper() == "LEAVERS":
                             continue
 
-                        parsed_leave = parse_date(ws.cell(r, col + 1).value, month, year)
+                        parsed_leave = parse_date(cell_value(rows, r, col + 1), month, year)
                         leave_month = parsed_leave[:7] if parsed_leave else default_leave_month
                         leave_date = parsed_leave or ""
+                        dedupe_key = (name.lower(), leave_month)
+                        if dedupe_key in leaver_rows:
+                            continue
                         sheet_day = ""
                         sheet_time = ""
 
-                        for probe_col in range(max(1, col - 4), col):
-                            probe_val = ws.cell(r, probe_col).value
-                            probe_text = str(probe_val).strip() if probe_val is not None else ""
-                            if probe_text in DAYS:
+                        # The label nearest the name wins, so probe right to
+                        # left and stop once both a day and a time are found.
+                        for probe_col in range(col - 1, max(1, col - 4) - 1, -1):
+                            probe_val = cell_value(rows, r, probe_col)
+                            if probe_val is None:
+                                continue
+                            probe_text = str(probe_val).strip()
+                            if not sheet_day and probe_text in DAY_SET:
                                 sheet_day = probe_text
-                            if ":" in probe_text:
+                            if not sheet_time and ":" in probe_text:
                                 maybe_time = normalise_time(probe_text)
                                 if maybe_time and ":" in maybe_time:
                                     sheet_time = maybe_time
-
-                        if not sheet_day or not sheet_time:
-                            for rr in range(r, max(leaver_header_row, r - 12), -1):
-                                probe_val = ws.cell(rr, max(1, col - 1)).value
-                                probe_text = str(probe_val).strip() if probe_val is not None else ""
-                                if not sheet_day and probe_text in DAYS:
-                                    sheet_day = probe_text
-                                if not sheet_time and ":" in probe_text:
-                                    maybe_time = normalise_time(probe_text)
-                                    if maybe_time and ":" in maybe_time:
-                                        sheet_time = maybe_time
-                                if sheet_day and sheet_time:
-                                    break
+                            if sheet_day and sheet_time:
+                                break
+
+                        # Fall back to labels up to 12 rows above (this row included).
+                        label_col = max(1, col - 1)
+                        day_row, day_label = last_day.get(label_col, (0, ""))
+                        if not sheet_day and day_row > r - 12:
+                            sheet_day = day_label
+                        time_row, time_label = last_time.get(label_col, (0, ""))
+                        if not sheet_time and time_row > r - 12:
+                            sheet_time = time_label
 
                         inferred_session = ""
                         inferred_class = ""
-                        matched = cur.execute("""
-                            SELECT session, class_name, taster_date
-                            FROM tasters
-                            WHERE lower(child)=lower(?) AND programme=?
-                              AND substr(taster_date, 1, 7)=?
-                            ORDER BY taster_date DESC
-                            LIMIT 1
-                        """, (name, programme, leave_month)).fetchone()
-                        if not matched:
-                            matched = cur.execute("""
-                                SELECT session, class_name, taster_date
-                                FROM tasters
-                                WHERE lower(child)=lower(?) AND programme=?
-                                ORDER BY taster_date DESC
-                                LIMIT 1
-                            """, (name, programme)).fetchone()
+                        candidates = taster_index.get(name.lower(), [])
+                        matched = next(
+                            (m for m in candidates if m[0][:7] == leave_month),
+                            candidates[0] if candidates else None,
+                        )
                         if matched:
-                            inferred_session = matched[0] or ""
-                            inferred_class = matched[1] or ""
+                            inferred_session = matched[1] or ""
+                            inferred_class = matched[2] or ""
                         if not inferred_session and (sheet_day or sheet_time):
                             inferred_session = " ".join([x for x in [sheet_day, sheet_time] if x]).strip()
-                        dedupe_key = (name.lower(), leave_month)
-                        if dedupe_key in seen_leavers:
-                            continue
-                        seen_leavers.add(dedupe_key)
 
-                        cur.execute("""
-                            INSERT OR IGNORE INTO leavers
-                            (child, programme, leave_month, leave_date, session, class_name, source)
-                            VALUES (?, ?, ?, ?, ?, ?, ?)
-                        """, (
+                        leaver_rows[dedupe_key] = (
                             name,
                             programme,
                             leave_month,
@@ -542,10 +729,12 @@ def import_excel(path, conn):
                             inferred_session,
                             inferred_class,
                             path.name
-                        ))
+                        )
 
-                        if cur.rowcount == 1:
-                            leavers_inserted += 1
+    if leaver_rows:
+        leavers_inserted = insert_rows(
+            cur, LEAVER_INSERT_SQL, LEAVER_ROW_PLACEHOLDER, leaver_rows.values()
+        )
 
     print(f"   ✔ Tasters: {tasters_inserted}")
     print(f"   ✔ Leavers: {leavers_inserted}")
@@ -562,9 +751,19 @@ def main():
     p.add_argument("--fallback-folder")
     p.add_argument("--db", default=str(DEFAULT_DB_PATH))
     p.add_argument("--apply", action="store_true")
+    p.add_argument(
+        "--engine",
+        choices=sorted(SHEET_LOADERS),
+        default=os.environ.get("TASTERIST_IMPORT_ENGINE", "openpyxl"),
+    )
     args = p.parse_args()
+    if args.engine not in SHEET_LOADERS:
+        p.error(f"unknown engine: {args.engine}")
+    if args.engine == "calamine" and not calamine_available():
+        print("⚠️ python-calamine not installed; falling back to openpyxl.")
+        args.engine = "openpyxl"
 
-    conn = sqlite3.connect(args.db)
+    conn = open_conn(args.db, bulk_load=True)
     conn.execute("""
         CREATE TABLE IF NOT EXISTS tasters (
             id INTEGER PRIMARY KEY AUTOINCREMENT,
@@ -611,6 +810,13 @@ def main():
         migrated = True
     if migrated:
         conn.commit()
+    # Same definition as the app's; covers load_taster_index's per-programme
+    # read when the importer runs against a database the app never opened.
+    conn.execute("""
+        CREATE INDEX IF NOT EXISTS idx_tasters_programme
+        ON tasters (programme, taster_date)
+    """)
+    conn.commit()
 
     root = Path(args.folder).expanduser().resolve()
     if not root.exists():
@@ -620,7 +826,7 @@ def main():
 
     candidate_files = [
         f for f in sorted(root.rglob("*.xlsx"))
-        if not f.name.startswith("~$") and is_supported_workbook(f.name)
+        if not f.name.startswith("~$") and classify_filename(f.name)[0]
     ]
 
     print(f"\n📂 Importing from OneDrive path:")
@@ -634,7 +840,7 @@ def main():
             for fb in sorted(fallback_root.rglob("*.xlsx")):
                 if fb.name.startswith("~$"):
                     continue
-                if is_supported_workbook(fb.name):
+                if classify_filename(fb.name)[0]:
                     fallback_candidates.append(fb)
                 fallback_lookup.setdefault(workbook_key(fb.name), fb)
 
@@ -654,11 +860,11 @@ def main():
         workbook_year = detect_workbook_year(file)
         try:
             if workbook_year == 2025:
-                if fallback and zipfile.is_zipfile(fallback):
+                if fallback and looks_like_xlsx(fallback):
                     print(f"⚠️ 2025 pinned to local archive: {fallback.name}")
                     readable_targets.append((file, fallback, "local-2025"))
                 else:
-                    if zipfile.is_zipfile(file):
+                    if looks_like_xlsx(file):
                         print(f"⚠️ 2025 archive missing locally: using uploaded/source copy for {file.name}")
                         readable_targets.append((file, file, "primary-2025"))
                     else:
@@ -666,8 +872,8 @@ def main():
                 scheduled_keys.add(file_key)
                 continue
 
-            if not zipfile.is_zipfile(file):
-                if fallback and zipfile.is_zipfile(fallback):
+            if not looks_like_xlsx(file):
+                if fallback and looks_like_xlsx(fallback):
                     print(f"⚠️ Primary unreadable, using local fallback: {file.name}")
                     readable_targets.append((file, fallback, "fallback"))
                 else:
@@ -688,7 +894,7 @@ def main():
         if key in scheduled_keys:
             continue
         try:
-            if zipfile.is_zipfile(fb):
+            if looks_like_xlsx(fb):
                 print(f"⚠️ 2025 missing in primary folder, using local archive: {fb.name}")
                 readable_targets.append((fb, fb, "local-2025"))
                 scheduled_keys.add(key)
@@ -707,11 +913,16 @@ def main():
         conn.commit()
 
     total_t = total_l = 0
-    for file, import_path, source_mode in readable_targets:
+    workbooks = loaded_workbooks([t[1] for t in readable_targets], args.engine)
+    for (file, import_path, source_mode), (sheets, load_error) in zip(readable_targets, workbooks):
         try:
             if source_mode in {"fallback", "local-2025"}:
                 print(f"ℹ️ Using local fallback: {file.name}")
-            t, l = import_excel(import_path, conn)
+            if load_error:
+                print(f"⚠️ SKIP (unexpected import error): {file}")
+                print(f"   ↳ {load_error}")
+                continue
+            t, l = import_excel(import_path, conn, args.engine, sheets)
             total_t += t
             total_l += l
         except Exception as exc:
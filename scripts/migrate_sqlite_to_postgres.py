@@ -114,7 +114,6 @@ def create_schema(pg):
                 UNIQUE(child, programme, leave_month)
             )
         """)
-    pg.commit()
 
 
 def sqlite_table_columns(conn, table_name: str) -> list[str]:
@@ -144,25 +143,34 @@ def truncate_tables(pg, table_names: Iterable[str]):
         cur.execute(
             "TRUNCATE TABLE " + ", ".join(table_names) + " RESTART IDENTITY CASCADE"
         )
-    pg.commit()
 
 
-def upsert_rows(pg, table_name: str, columns: Sequence[str], rows):
+def upsert_rows(pg, table_name: str, columns: Sequence[str], rows, conflict_mode: str = "upsert"):
     if not rows:
         return 0
-    placeholders = ", ".join(["%s"] * len(columns))
     col_list = ", ".join(columns)
-    updates = ", ".join([f"{c}=EXCLUDED.{c}" for c in columns if c != "id"])
-    sql = f"""
-        INSERT INTO {table_name} ({col_list})
-        VALUES ({placeholders})
-        ON CONFLICT (id) DO UPDATE SET {updates}
-    """
-    payload = [tuple(row[c] for c in columns) for row in rows]
+    # After --truncate-first every row is new, so skip the conflict check.
+    if conflict_mode == "plain":
+        on_conflict = ""
+    else:
+        updates = ", ".join([f"{c}=EXCLUDED.{c}" for c in columns if c != "id"])
+        on_conflict = f"ON CONFLICT (id) DO UPDATE SET {updates}"
+    stage = f"_stage_{table_name}"
+    # COPY the rows into a temp table in one stream, then upsert them with a
+    # single INSERT ... SELECT instead of one bound statement per row.
     with pg.cursor() as cur:
-        cur.executemany(sql, payload)
-    pg.commit()
-    return len(payload)
+        cur.execute(
+            f"CREATE TEMP TABLE {stage} (LIKE {table_name} INCLUDING DEFAULTS) ON COMMIT DROP"
+        )
+        with cur.copy(f"COPY {stage} ({col_list}) FROM STDIN") as copy:
+            for row in rows:
+                copy.write_row(tuple(row[c] for c in columns))
+        cur.execute(f"""
+            INSERT INTO {table_name} ({col_list})
+            SELECT {col_list} FROM {stage}
+            {on_conflict}
+        """)
+    return len(rows)
 
 
 def sync_sequence(pg, table_name: str):
@@ -177,7 +185,6 @@ def sync_sequence(pg, table_name: str):
         cur.execute(f"SELECT COALESCE(MAX(id), 1) FROM {table_name}")
         max_id = cur.fetchone()[0]
         cur.execute("SELECT setval(%s, %s, true)", (seq_name, max_id))
-    pg.commit()
 
 
 def main():
@@ -198,22 +205,27 @@ def main():
     pg_conn = psycopg.connect(args.postgres_url)
 
     try:
+        # The whole sync is one transaction: a failed run rolls back cleanly and
+        # is simply re-run, so the commit need not wait for the WAL flush.
+        pg_conn.execute("SET synchronous_commit = OFF")
         create_schema(pg_conn)
 
         if args.truncate_first:
             truncate_tables(pg_conn, reversed(TABLE_ORDER))
 
+        conflict_mode = "plain" if args.truncate_first else "upsert"
         total_rows = 0
         for table_name in TABLE_ORDER:
             src_cols = sqlite_table_columns(sqlite_conn, table_name)
             dst_cols = postgres_table_columns(pg_conn, table_name)
             cols = [c for c in src_cols if c in dst_cols]
             rows = fetch_sqlite_rows(sqlite_conn, table_name, cols)
-            written = upsert_rows(pg_conn, table_name, cols, rows)
+            written = upsert_rows(pg_conn, table_name, cols, rows, conflict_mode)
             sync_sequence(pg_conn, table_name)
             total_rows += written
             print(f"{table_name}: {written} row(s)")
 
+        pg_conn.commit()
         print(f"\nMigration complete. Total rows synced: {total_rows}")
     finally:
         sqlite_conn.close()
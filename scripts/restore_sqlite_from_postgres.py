@@ -11,15 +11,34 @@ Usage:
 
 import argparse
 import os
+import queue
 import sqlite3
+import sys
+import threading
+from datetime import date, datetime
 from pathlib import Path
-from typing import Iterable, Sequence
+from typing import Iterable, Iterator, Sequence
 
 import psycopg
 
 
 BASE_DIR = Path(__file__).resolve().parents[1]
+if str(BASE_DIR) not in sys.path:
+    sys.path.insert(0, str(BASE_DIR))
+
+from script_helpers import open_conn
+
 DEFAULT_SQLITE_PATH = BASE_DIR / "data" / "db" / "tasterist.db"
+MMAP_SIZE = 256 * 1024 * 1024
+PG_BATCH_ROWS = 5000
+PG_QUEUE_BATCHES = 4
+END_OF_TABLE = object()
+
+# psycopg returns date/datetime for DATE/TIMESTAMP columns (taster_date,
+# users.created_at). Bind them as the same ISO text sqlite3's deprecated
+# default adapters produced, without a DeprecationWarning per value.
+sqlite3.register_adapter(date, date.isoformat)
+sqlite3.register_adapter(datetime, lambda value: value.isoformat(" "))
 
 TABLE_ORDER = (
     "users",
@@ -31,149 +50,220 @@ TABLE_ORDER = (
 )
 
 
+SCHEMA_SQL = """
+CREATE TABLE IF NOT EXISTS users (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    username TEXT UNIQUE,
+    password_hash TEXT NOT NULL DEFAULT '',
+    full_name TEXT NOT NULL DEFAULT '',
+    role TEXT NOT NULL DEFAULT 'staff',
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    password_must_change INTEGER NOT NULL DEFAULT 0
+);
+
+CREATE TABLE IF NOT EXISTS user_admin_days (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    user_id INTEGER NOT NULL,
+    day_name TEXT NOT NULL,
+    programme TEXT NOT NULL,
+    UNIQUE(user_id, day_name, programme),
+    FOREIGN KEY(user_id) REFERENCES users(id) ON DELETE CASCADE
+);
+
+CREATE TABLE IF NOT EXISTS audit_logs (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    created_at TEXT NOT NULL DEFAULT (datetime('now')),
+    user_id INTEGER,
+    username TEXT NOT NULL DEFAULT 'system',
+    action TEXT NOT NULL,
+    entity_type TEXT NOT NULL DEFAULT '',
+    entity_id TEXT NOT NULL DEFAULT '',
+    status TEXT NOT NULL DEFAULT 'ok',
+    details TEXT NOT NULL DEFAULT ''
+);
+
+CREATE TABLE IF NOT EXISTS class_sessions (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    programme TEXT NOT NULL,
+    location TEXT NOT NULL,
+    session_date TEXT NOT NULL DEFAULT '',
+    day TEXT NOT NULL,
+    class_name TEXT NOT NULL,
+    start_time TEXT NOT NULL,
+    end_time TEXT NOT NULL DEFAULT '',
+    source_file TEXT DEFAULT '',
+    UNIQUE(programme, session_date, day, class_name, start_time, end_time)
+);
+
+CREATE TABLE IF NOT EXISTS tasters (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    child TEXT NOT NULL,
+    programme TEXT NOT NULL,
+    location TEXT NOT NULL,
+    session TEXT NOT NULL,
+    class_name TEXT NOT NULL DEFAULT '',
+    taster_date TEXT NOT NULL,
+    notes TEXT,
+    attended INTEGER DEFAULT 0,
+    club_fees INTEGER DEFAULT 0,
+    bg INTEGER DEFAULT 0,
+    badge INTEGER DEFAULT 0,
+    reschedule_contacted INTEGER DEFAULT 0,
+    UNIQUE(child, programme, taster_date, session)
+);
+
+CREATE TABLE IF NOT EXISTS leavers (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    child TEXT NOT NULL,
+    programme TEXT NOT NULL,
+    leave_month TEXT NOT NULL,
+    leave_date TEXT DEFAULT '',
+    class_day TEXT DEFAULT '',
+    session TEXT DEFAULT '',
+    class_name TEXT DEFAULT '',
+    removed_la INTEGER DEFAULT 0,
+    removed_bg INTEGER DEFAULT 0,
+    added_to_board INTEGER DEFAULT 0,
+    reason TEXT DEFAULT '',
+    email TEXT DEFAULT '',
+    source TEXT DEFAULT 'import',
+    UNIQUE(child, programme, leave_month)
+);
+"""
+
+
+def open_sqlite(path: str) -> sqlite3.Connection:
+    # Same WAL/NORMAL setup as the import scripts, so a restore into the live
+    # file doesn't flip its journal mode, plus mmap reads for the bulk load.
+    conn = open_conn(path, cached_statements=256, bulk_load=True)
+    conn.execute(f"PRAGMA mmap_size={MMAP_SIZE}")
+    return conn
+
+
 def create_sqlite_schema(conn: sqlite3.Connection) -> None:
-    cur = conn.cursor()
-    cur.execute(
-        """
-        CREATE TABLE IF NOT EXISTS users (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            username TEXT UNIQUE,
-            password_hash TEXT NOT NULL DEFAULT '',
-            full_name TEXT NOT NULL DEFAULT '',
-            role TEXT NOT NULL DEFAULT 'staff',
-            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-            password_must_change INTEGER NOT NULL DEFAULT 0
-        )
-        """
-    )
-    cur.execute(
-        """
-        CREATE TABLE IF NOT EXISTS user_admin_days (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            user_id INTEGER NOT NULL,
-            day_name TEXT NOT NULL,
-            programme TEXT NOT NULL,
-            UNIQUE(user_id, day_name, programme),
-            FOREIGN KEY(user_id) REFERENCES users(id) ON DELETE CASCADE
-        )
-        """
-    )
-    cur.execute(
-        """
-        CREATE TABLE IF NOT EXISTS audit_logs (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            created_at TEXT NOT NULL DEFAULT (datetime('now')),
-            user_id INTEGER,
-            username TEXT NOT NULL DEFAULT 'system',
-            action TEXT NOT NULL,
-            entity_type TEXT NOT NULL DEFAULT '',
-            entity_id TEXT NOT NULL DEFAULT '',
-            status TEXT NOT NULL DEFAULT 'ok',
-            details TEXT NOT NULL DEFAULT ''
-        )
-        """
-    )
-    cur.execute(
-        """
-        CREATE TABLE IF NOT EXISTS class_sessions (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            programme TEXT NOT NULL,
-            location TEXT NOT NULL,
-            session_date TEXT NOT NULL DEFAULT '',
-            day TEXT NOT NULL,
-            class_name TEXT NOT NULL,
-            start_time TEXT NOT NULL,
-            end_time TEXT NOT NULL DEFAULT '',
-            source_file TEXT DEFAULT '',
-            UNIQUE(programme, session_date, day, class_name, start_time, end_time)
-        )
-        """
-    )
-    cur.execute(
-        """
-        CREATE TABLE IF NOT EXISTS tasters (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            child TEXT NOT NULL,
-            programme TEXT NOT NULL,
-            location TEXT NOT NULL,
-            session TEXT NOT NULL,
-            class_name TEXT NOT NULL DEFAULT '',
-            taster_date TEXT NOT NULL,
-            notes TEXT,
-            attended INTEGER DEFAULT 0,
-            club_fees INTEGER DEFAULT 0,
-            bg INTEGER DEFAULT 0,
-            badge INTEGER DEFAULT 0,
-            reschedule_contacted INTEGER DEFAULT 0,
-            UNIQUE(child, programme, taster_date, session)
-        )
-        """
-    )
-    cur.execute(
-        """
-        CREATE TABLE IF NOT EXISTS leavers (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            child TEXT NOT NULL,
-            programme TEXT NOT NULL,
-            leave_month TEXT NOT NULL,
-            leave_date TEXT DEFAULT '',
-            class_day TEXT DEFAULT '',
-            session TEXT DEFAULT '',
-            class_name TEXT DEFAULT '',
-            removed_la INTEGER DEFAULT 0,
-            removed_bg INTEGER DEFAULT 0,
-            added_to_board INTEGER DEFAULT 0,
-            reason TEXT DEFAULT '',
-            email TEXT DEFAULT '',
-            source TEXT DEFAULT 'import',
-            UNIQUE(child, programme, leave_month)
-        )
-        """
-    )
-    conn.commit()
+    # executescript runs outside any transaction, so the tables exist and are
+    # committed before the restore's BEGIN IMMEDIATE.
+    conn.executescript(SCHEMA_SQL)
 
 
-def sqlite_table_columns(conn: sqlite3.Connection, table_name: str) -> list[str]:
-    rows = conn.execute(f"PRAGMA table_info({table_name})").fetchall()
-    return [row[1] for row in rows]
+def sqlite_table_columns(conn: sqlite3.Connection, table_names: Sequence[str]) -> dict[str, list[str]]:
+    # table -> column names in table order, from one pragma_table_info join.
+    columns = {name: [] for name in table_names}
+    marks = ", ".join(["?"] * len(table_names))
+    rows = conn.execute(
+        f"SELECT m.name, p.name FROM sqlite_master AS m "
+        f"JOIN pragma_table_info(m.name) AS p "
+        f"WHERE m.type='table' AND m.name IN ({marks}) "
+        f"ORDER BY m.name, p.cid",
+        tuple(table_names),
+    ).fetchall()
+    for table_name, column_name in rows:
+        columns[table_name].append(column_name)
+    return columns
 
 
-def postgres_table_columns(pg, table_name: str) -> list[str]:
+def postgres_table_columns(pg, table_names: Sequence[str]) -> dict[str, dict[str, str]]:
+    # table -> {column name: type name} in table order, for every table in one
+    # information_schema round trip; the types drive binary COPY.
+    columns = {name: {} for name in table_names}
     with pg.cursor() as cur:
         cur.execute(
             """
-            SELECT column_name
+            SELECT table_name, column_name, udt_name
             FROM information_schema.columns
-            WHERE table_schema='public' AND table_name=%s
-            ORDER BY ordinal_position
+            WHERE table_schema='public' AND table_name = ANY(%s)
+            ORDER BY table_name, ordinal_position
             """,
-            (table_name,),
+            (list(table_names),),
         )
-        return [r[0] for r in cur.fetchall()]
+        for table_name, column_name, udt_name in cur.fetchall():
+            columns[table_name][column_name] = udt_name
+    return columns
 
 
-def fetch_postgres_rows(pg, table_name: str, columns: Sequence[str]):
+def fetch_postgres_rows(
+    pg, table_name: str, columns: Sequence[str], types: Sequence[str]
+) -> Iterator[tuple]:
+    # COPY streams the whole table through one pipe. Binary format with the
+    # column types set yields the same Python values a SELECT would.
+    col_list = ", ".join(columns)
     with pg.cursor() as cur:
-        col_list = ", ".join(columns)
-        cur.execute(f"SELECT {col_list} FROM {table_name}")
-        return cur.fetchall()
+        with cur.copy(
+            f"COPY (SELECT {col_list} FROM {table_name}) TO STDOUT (FORMAT BINARY)"
+        ) as copy:
+            copy.set_types(types)
+            yield from copy.rows()
+
+
+def produce_table_rows(pg, plan, batches: queue.Queue) -> None:
+    # Background reader: streams each planned table out of Postgres in batches
+    # so the next rows are in flight while SQLite writes the current ones. The
+    # bounded queue caps how far ahead it reads; errors go to the consumer.
+    try:
+        for table_name, columns, types in plan:
+            batch = []
+            for row in fetch_postgres_rows(pg, table_name, columns, types):
+                batch.append(row)
+                if len(batch) >= PG_BATCH_ROWS:
+                    batches.put(batch)
+                    batch = []
+            if batch:
+                batches.put(batch)
+            batches.put(END_OF_TABLE)
+    except Exception as exc:
+        batches.put(exc)
+
+
+def queued_rows(batches: queue.Queue) -> Iterator[tuple]:
+    # One table's rows from produce_table_rows, in order.
+    while True:
+        item = batches.get()
+        if item is END_OF_TABLE:
+            return
+        if isinstance(item, Exception):
+            raise item
+        yield from item
+
+
+def drop_sqlite_indexes(conn: sqlite3.Connection, table_names: Sequence[str]) -> list[str]:
+    # Explicit indexes only (the app's uniq_*/idx_* ones); the autoindexes
+    # behind inline UNIQUE(...) constraints have no SQL and can't be dropped.
+    # Returns their CREATE statements for recreate_sqlite_indexes.
+    marks = ", ".join(["?"] * len(table_names))
+    rows = conn.execute(
+        f"SELECT name, sql FROM sqlite_master "
+        f"WHERE type='index' AND sql IS NOT NULL AND tbl_name IN ({marks})",
+        tuple(table_names),
+    ).fetchall()
+    for name, _sql in rows:
+        conn.execute(f'DROP INDEX "{name}"')
+    return [sql for _name, sql in rows]
+
+
+def recreate_sqlite_indexes(conn: sqlite3.Connection, create_sql: Iterable[str]) -> None:
+    # One sorted build per index after the load; a unique index that no longer
+    # holds fails here and the restore rolls back.
+    for sql in create_sql:
+        conn.execute(sql)
 
 
 def truncate_sqlite(conn: sqlite3.Connection, table_names: Iterable[str]) -> None:
     cur = conn.cursor()
-    cur.execute("PRAGMA foreign_keys=OFF")
     for name in table_names:
         cur.execute(f"DELETE FROM {name}")
-    cur.execute("PRAGMA foreign_keys=ON")
-    conn.commit()
 
 
-def upsert_sqlite_rows(conn: sqlite3.Connection, table_name: str, columns: Sequence[str], rows) -> int:
-    if not rows:
-        return 0
+def upsert_sqlite_rows(
+    conn: sqlite3.Connection,
+    table_name: str,
+    columns: Sequence[str],
+    rows: Iterable,
+    conflict_mode: str = "upsert",
+) -> int:
     placeholders = ", ".join(["?"] * len(columns))
     col_list = ", ".join(columns)
-    if "id" in columns:
+    # After --truncate-first every row is new, so skip the conflict check.
+    if "id" in columns and conflict_mode != "plain":
         updates = ", ".join([f"{c}=excluded.{c}" for c in columns if c != "id"])
         sql = (
             f"INSERT INTO {table_name} ({col_list}) VALUES ({placeholders}) "
@@ -181,26 +271,26 @@ def upsert_sqlite_rows(conn: sqlite3.Connection, table_name: str, columns: Seque
         )
     else:
         sql = f"INSERT INTO {table_name} ({col_list}) VALUES ({placeholders})"
-    conn.executemany(sql, rows)
-    conn.commit()
-    return len(rows)
+    # rows may be a stream; each row inserts or updates exactly once, so the
+    # change count is the number of rows written.
+    return conn.executemany(sql, rows).rowcount
 
 
 def sync_sqlite_sequence(conn: sqlite3.Connection, table_name: str) -> None:
-    row = conn.execute(
-        "SELECT name FROM sqlite_master WHERE type='table' AND name='sqlite_sequence'"
-    ).fetchone()
-    if not row:
-        return
-    max_id = conn.execute(f"SELECT COALESCE(MAX(id), 0) FROM {table_name}").fetchone()[0]
-    exists = conn.execute(
-        "SELECT 1 FROM sqlite_sequence WHERE name=?", (table_name,)
-    ).fetchone()
-    if exists:
-        conn.execute("UPDATE sqlite_sequence SET seq=? WHERE name=?", (max_id, table_name))
-    else:
-        conn.execute("INSERT INTO sqlite_sequence(name, seq) VALUES (?, ?)", (table_name, max_id))
-    conn.commit()
+    # Every restored table is AUTOINCREMENT, so sqlite_sequence exists once
+    # the schema is in place. sqlite_sequence.name has no UNIQUE constraint
+    # for an ON CONFLICT upsert; update in place and insert only if missing.
+    cur = conn.execute(
+        f"UPDATE sqlite_sequence SET seq=(SELECT COALESCE(MAX(id), 0) FROM {table_name}) "
+        f"WHERE name=?",
+        (table_name,),
+    )
+    if cur.rowcount == 0:
+        conn.execute(
+            f"INSERT INTO sqlite_sequence(name, seq) "
+            f"SELECT ?, COALESCE(MAX(id), 0) FROM {table_name}",
+            (table_name,),
+        )
 
 
 def main() -> None:
@@ -212,6 +302,7 @@ def main() -> None:
         help="Postgres connection URL (defaults to DATABASE_URL)",
     )
     parser.add_argument("--truncate-first", action="store_true", help="Clear destination tables before restore")
+    parser.add_argument("--no-vacuum", action="store_true", help="Skip compacting the sqlite file after restore")
     args = parser.parse_args()
 
     if not args.postgres_url.strip():
@@ -220,27 +311,65 @@ def main() -> None:
     sqlite_path = Path(args.sqlite)
     sqlite_path.parent.mkdir(parents=True, exist_ok=True)
 
-    sqlite_conn = sqlite3.connect(args.sqlite)
+    sqlite_conn = open_sqlite(args.sqlite)
     pg_conn = psycopg.connect(args.postgres_url)
 
     try:
         create_sqlite_schema(sqlite_conn)
 
+        # The whole restore is one transaction: a failure part-way leaves the
+        # SQLite file as it was. foreign_keys can't change mid-transaction, so
+        # turn it off up front (builds may default it on); parents load first,
+        # and Postgres already enforced user_admin_days.user_id.
+        sqlite_conn.execute("PRAGMA foreign_keys=OFF")
+        sqlite_conn.execute("BEGIN IMMEDIATE")
+        dropped_indexes = []
         if args.truncate_first:
             truncate_sqlite(sqlite_conn, reversed(TABLE_ORDER))
+            # Empty tables: build secondary indexes once after loading rather
+            # than maintaining them row by row.
+            dropped_indexes = drop_sqlite_indexes(sqlite_conn, TABLE_ORDER)
 
+        conflict_mode = "plain" if args.truncate_first else "upsert"
         total_rows = 0
+        pg_columns = postgres_table_columns(pg_conn, TABLE_ORDER)
+        sqlite_columns = sqlite_table_columns(sqlite_conn, TABLE_ORDER)
+        plan = []
         for table_name in TABLE_ORDER:
-            src_cols = postgres_table_columns(pg_conn, table_name)
-            dst_cols = sqlite_table_columns(sqlite_conn, table_name)
-            cols = [c for c in src_cols if c in dst_cols]
-            rows = fetch_postgres_rows(pg_conn, table_name, cols)
-            written = upsert_sqlite_rows(sqlite_conn, table_name, cols, rows)
+            src_types = pg_columns[table_name]
+            dst_cols = set(sqlite_columns[table_name])
+            cols = [c for c in src_types if c in dst_cols]
+            plan.append((table_name, cols, [src_types[c] for c in cols]))
+
+        # Postgres reads run on their own thread; only this thread touches
+        # SQLite, which serialises writes anyway.
+        batches = queue.Queue(maxsize=PG_QUEUE_BATCHES)
+        producer = threading.Thread(
+            target=produce_table_rows, args=(pg_conn, plan, batches), daemon=True
+        )
+        producer.start()
+        for table_name, cols, _types in plan:
+            rows = queued_rows(batches)
+            written = upsert_sqlite_rows(sqlite_conn, table_name, cols, rows, conflict_mode)
             sync_sqlite_sequence(sqlite_conn, table_name)
             total_rows += written
             print(f"{table_name}: {written} row(s)")
 
+        producer.join()
+        recreate_sqlite_indexes(sqlite_conn, dropped_indexes)
+        sqlite_conn.commit()
+
+        # Outside the restore transaction: fold the WAL back in and rebuild the
+        # file without the pages freed by the DELETEs and upserts, then
+        # refresh sqlite_stat1 for the planner.
+        if not args.no_vacuum:
+            sqlite_conn.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+            sqlite_conn.execute("VACUUM")
+        sqlite_conn.execute("ANALYZE")
         print(f"\nRestore complete. Total rows synced: {total_rows}")
+    except Exception:
+        sqlite_conn.rollback()
+        raise
     finally:
         sqlite_conn.close()
         pg_conn.close()